@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache of extracted article bodies
+- Maps sha256(url) -> compressed JSON of the extracted (description, body text)
+- zstd when the zstandard package is installed, zlib otherwise
+- Age-based expiry plus a total-size cap (least recently used evicted first)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from scraper_resources import CACHE_DIR
+
+MAX_BYTES = int(os.getenv('ARTICLE_CACHE_MAX_MB', '64')) * 1024 * 1024
+MAX_AGE_DAYS = int(os.getenv('ARTICLE_CACHE_MAX_AGE_DAYS', '30'))
+
+
+class ArticleCache:
+    def __init__(self, path=CACHE_DIR / 'article_cache.sqlite', max_bytes=MAX_BYTES,
+                 max_age_days=MAX_AGE_DAYS):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            ' key TEXT PRIMARY KEY, codec TEXT, blob BLOB, size INTEGER,'
+            ' created_at REAL, accessed_at REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS articles_accessed ON articles (accessed_at)')
+        self.lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+
+        if zstandard is not None:
+            self.codec = 'zstd'
+            self._compressor = zstandard.ZstdCompressor(level=10)
+        else:
+            self.codec = 'zlib'
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _compress(self, data):
+        if self.codec == 'zstd':
+            return self._compressor.compress(data)
+        return zlib.compress(data, 9)
+
+    @staticmethod
+    def _decompress(codec, blob):
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(blob)
+        return zlib.decompress(blob)
+
+    def get(self, url):
+        """Return (description, body) for a cached URL, or None"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT codec, blob, created_at FROM articles WHERE key = ?', (self.key(url),)
+            ).fetchone()
+
+            if row is None or now - row[2] > self.max_age or (row[0] == 'zstd' and zstandard is None):
+                self.misses += 1
+                return None
+
+            self.conn.execute('UPDATE articles SET accessed_at = ? WHERE key = ?', (now, self.key(url)))
+            self.hits += 1
+
+        data = json.loads(self._decompress(row[0], row[1]))
+        if 'body' not in data:
+            # Entry from before bodies were cached (locations only); refetch it
+            with self.lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return data['description'], data['body']
+
+    def put(self, url, description, body):
+        blob = self._compress(json.dumps({'description': description, 'body': body}).encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO articles (key, codec, blob, size, created_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (self.key(url), self.codec, blob, len(blob), now, now)
+            )
+            self.conn.commit()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the size cap"""
+        with self.lock:
+            self.conn.execute('DELETE FROM articles WHERE created_at < ?', (time.time() - self.max_age,))
+
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM articles').fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                stale = []
+                for key, size in self.conn.execute('SELECT key, size FROM articles ORDER BY accessed_at'):
+                    if excess <= 0:
+                        break
+                    stale.append((key,))
+                    excess -= size
+                self.conn.executemany('DELETE FROM articles WHERE key = ?', stale)
+
+            self.conn.commit()
+
+    def close(self):
+        self.evict()
+        self.conn.close()
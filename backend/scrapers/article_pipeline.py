@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Streaming article pipeline shared by the news scrapers
+- scrape_* functions are generators that yield one article at a time
+- dedup -> enrich -> save stages run as the articles arrive
+- The save stage is a background writer draining a bounded queue with
+  bulk upserts, so results are persisted incrementally and a crash loses at
+  most one batch; a full queue blocks the scrapers (back-pressure)
+- Stats are counted on the fly instead of from a list of every article
+- An optional near-duplicate index drops syndicated copies of a story that
+  arrive under another URL, fingerprinted on the fetched text before they
+  are enriched; an article is only indexed once the batch it was saved in
+  is written without failures
+- With an EnrichmentPool the enrich stage runs on worker processes in
+  batches, so CPU-bound analysis scales across cores and stays off the I/O
+  threads; one pool is created per process and shared by every pipeline
+- Given a sentiment_text function, each batch sent to an EnrichmentPool is
+  scored with one score_batch call before enrich runs; without a pool the
+  stream stays unbuffered and enrich scores through the shared service
+"""
+
+import importlib
+import multiprocessing
+import os
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from mongo_bulk import bulk_upsert
+
+QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '200'))
+BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', '25'))
+# A partial batch is written once the stream has been idle this long
+FLUSH_INTERVAL = float(os.getenv('PIPELINE_FLUSH_INTERVAL', '2'))
+# Enrichment worker processes (0 = enrich inline) and articles per task
+ENRICH_PROCESSES = int(os.getenv('ENRICH_PROCESSES', '0'))
+ENRICH_BATCH_SIZE = int(os.getenv('ENRICH_BATCH_SIZE', '32'))
+
+_DONE = object()
+
+
+class StreamStats:
+    def __init__(self, source_label=None):
+        """
+        source_label: article -> name used for the by-source breakdown
+        """
+        self.source_label = source_label or (lambda article: article['source']['name'])
+        self.total = 0
+        self.duplicates = 0
+        self.near_duplicates = 0
+        self.errors = 0
+        self.sentiment = Counter()
+        self.sources = Counter()
+
+    def add(self, article):
+        self.total += 1
+        self.sentiment[article['sentiment']['label']] += 1
+        self.sources[self.source_label(article)] += 1
+
+    def print_summary(self):
+        print(f"\n😊 Sentiment:")
+        print(f"   Positive: {self.sentiment['positive']} | "
+              f"Neutral: {self.sentiment['neutral']} | "
+              f"Negative: {self.sentiment['negative']}")
+
+        print(f"\n📊 By Source:")
+        for src, count in self.sources.most_common():
+            print(f"   {src}: {count} articles")
+
+        if self.duplicates or self.near_duplicates or self.errors:
+            print(f"\n♻️  Duplicates dropped: {self.duplicates} | 🧬 Near-duplicates: {self.near_duplicates} | "
+                  f"⚠️  Enrichment errors: {self.errors}")
+
+
+class BulkSaver:
+    """Save stage: a writer thread that bulk-upserts articles in batches"""
+
+    def __init__(self, collection, key, update_fields=None, batch_size=BATCH_SIZE,
+                 queue_size=QUEUE_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.collection = collection
+        self.key = key
+        self.update_fields = update_fields
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counts = {'inserted': 0, 'updated': 0, 'failed': 0}
+        self.batches = 0
+        self.listeners = []
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add_listener(self, callback):
+        """callback(batch, ok) runs on the writer thread after each batch; ok means nothing failed"""
+        self.listeners.append(callback)
+
+    def put(self, article):
+        self.queue.put(article)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            counts = bulk_upsert(self.collection, batch, key=self.key, update_fields=self.update_fields)
+        except Exception as e:
+            print(f"   ❌ Save error ({len(batch)} articles): {e}")
+            counts = {'inserted': 0, 'updated': 0, 'failed': len(batch)}
+
+        for name in self.counts:
+            self.counts[name] += counts[name]
+        self.batches += 1
+        for callback in self.listeners:
+            callback(list(batch), not counts['failed'])
+        batch.clear()
+
+    def _run(self):
+        batch = []
+        while True:
+            try:
+                article = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush(batch)
+                continue
+
+            if article is _DONE:
+                self._flush(batch)
+                return
+
+            batch.append(article)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+
+    def close(self):
+        """Write whatever is still queued and stop the writer"""
+        self.queue.put(_DONE)
+        self.thread.join()
+        return self.counts
+
+    def print_counts(self):
+        print(f"\n💾 Saved in {self.batches} batches: "
+              f"✅ {self.counts['inserted']} new | 🔄 {self.counts['updated']} updated | "
+              f"⚠️  {self.counts['failed']} failed")
+
+
+_worker_functions = {}
+
+
+def _init_enrich_worker():
+    """Runs once per worker process: sentiment is scored inline here"""
+    from sentiment_service import shared_sentiment
+
+    shared_sentiment().make_inline()
+
+
+def _function_ref(function):
+    return (function.__module__, function.__name__) if function else None
+
+
+def _worker_function(ref):
+    """
+    Import on first use in each worker: importing the scraper module compiles
+    its keyword tables and loads the sentiment backend
+    """
+    if ref not in _worker_functions:
+        module_name, function_name = ref
+        _worker_functions[ref] = getattr(importlib.import_module(module_name), function_name)
+    return _worker_functions[ref]
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prescore(articles, sentiment_text):
+    """
+    Score a batch with one score_batch call and store each result as
+    article['sentiment'], which enrich functions use instead of scoring again.
+    On any error the articles are left as they are.
+    """
+    from sentiment_service import shared_sentiment
+
+    try:
+        results = shared_sentiment().score_batch([sentiment_text(article) for article in articles])
+    except Exception as e:
+        print(f"   ⚠️  Batch sentiment failed, scoring per article: {e}")
+        return
+    for article, result in zip(articles, results):
+        article['sentiment'] = result
+
+
+def _enrich_batch(enrich_ref, sentiment_ref, articles):
+    """Worker task: enriched articles, None for any that raised"""
+    enrich = _worker_function(enrich_ref)
+    if sentiment_ref:
+        prescore(articles, _worker_function(sentiment_ref))
+    enriched = []
+    for article in articles:
+        try:
+            enriched.append(enrich(article))
+        except Exception:
+            enriched.append(None)
+    return enriched
+
+
+class EnrichmentPool:
+    """
+    Process pool running module-level enrich functions on article batches.
+    Create one per process and pass it to every run_pipeline call; workers
+    are spawned on first use and live until close().
+    """
+
+    def __init__(self, processes=ENRICH_PROCESSES, batch_size=ENRICH_BATCH_SIZE):
+        self.processes = processes
+        self.batch_size = batch_size
+        # spawn: the parent has live threads (savers, HTTP pool), unsafe to fork
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_enrich_worker
+        )
+
+    def imap(self, enrich, articles, sentiment_text=None):
+        """
+        Yield enriched articles (None on failure) in input order, two batches
+        in flight per worker; sentiment_text must be module-level as well
+        """
+        pending = deque()
+        for batch in _batches(articles, self.batch_size):
+            task = self.executor.submit(_enrich_batch, _function_ref(enrich), _function_ref(sentiment_text), batch)
+            pending.append((task, len(batch)))
+            if len(pending) >= 2 * self.processes:
+                yield from self._result(*pending.popleft())
+        while pending:
+            yield from self._result(*pending.popleft())
+
+    @staticmethod
+    def _result(future, size):
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"   ❌ Enrichment worker failed: {e}")
+            return [None] * size
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def _dedup(articles, key, stats):
+    seen = set()
+    for article in articles:
+        if article[key] in seen:
+            stats.duplicates += 1
+            continue
+        seen.add(article[key])
+        yield article
+
+
+def article_text(article):
+    """Text a news article is fingerprinted on: title, description and body if fetched"""
+    return ' '.join(article.get(field) or '' for field in ('title', 'description', 'body'))
+
+
+def _near_dedup(articles, key, index, stats):
+    for article in articles:
+        # Held until its batch is saved, so copies later in this run are dropped too
+        match = index.check(article[key], article_text(article), hold=True)
+        if match:
+            stats.near_duplicates += 1
+            print(f"   🧬 Near-duplicate ({match[1]:.2f}) of {match[0][:60]}: {article['title'][:50]}...")
+            continue
+        yield article
+
+
+def _enriched(articles, enrich, stats, pool=None, sentiment_text=None, failed=None):
+    """Enrich stage; articles that fail are counted, passed to failed() and dropped"""
+    if enrich and pool is not None:
+        # Results come back in input order, so the inputs can be matched up
+        inputs = deque()
+
+        def remember(articles):
+            for article in articles:
+                inputs.append(article)
+                yield article
+
+        for article in pool.imap(enrich, remember(articles), sentiment_text):
+            original = inputs.popleft()
+            if article is None:
+                stats.errors += 1
+                if failed:
+                    failed(original)
+                continue
+            yield article
+        return
+
+    # Inline, each article goes straight through so saves stay incremental;
+    # the sentiment service micro-batches across the sources' threads
+    for article in articles:
+        if enrich:
+            try:
+                article = enrich(article)
+            except Exception as e:
+                stats.errors += 1
+                if failed:
+                    failed(article)
+                continue
+        yield article
+
+
+def run_pipeline(articles, saver, key='url', enrich=None, stats=None, pool=None, near_dups=None,
+                 sentiment_text=None):
+    """
+    Drive an article stream through dedup -> enrich -> save.
+    enrich: optional article -> article callable; articles it raises on are
+    counted and skipped. With an EnrichmentPool it must be a module-level
+    function, and runs on the pool's worker processes.
+    sentiment_text: optional article -> text scored for sentiment; on a pool,
+    each batch is scored at once and enrich finds the result in article['sentiment'].
+    near_dups: optional NearDuplicateIndex; near-duplicates of an already
+    indexed article are dropped before enrichment, and saved articles are
+    indexed as their batches are written. Returns the StreamStats.
+    """
+    stats = stats or StreamStats()
+    articles = _dedup(articles, key, stats)
+    not_saved = None
+
+    if near_dups is not None:
+        def index_saved(batch, ok):
+            keys = [article[key] for article in batch]
+            if ok:
+                near_dups.add(keys)
+            else:
+                near_dups.discard(keys)
+
+        def not_saved(article):
+            near_dups.discard([article[key]])
+
+        saver.add_listener(index_saved)
+        articles = _near_dedup(articles, key, near_dups, stats)
+
+    articles = _enriched(articles, enrich, stats, pool, sentiment_text, failed=not_saved)
+
+    for article in articles:
+        stats.add(article)
+        saver.put(article)
+
+    return stats
+
+
+def parallel_stream(producers, max_workers, queue_size=QUEUE_SIZE):
+    """
+    Run zero-argument generator functions on a thread pool and yield their
+    items as they are produced, through one bounded queue
+    """
+    items = queue.Queue(maxsize=queue_size)
+
+    def drain(producer):
+        try:
+            for item in producer():
+                items.put(item)
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+        finally:
+            items.put(_DONE)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for producer in producers:
+            executor.submit(drain, producer)
+
+        remaining = len(producers)
+        while remaining:
+            item = items.get()
+            if item is _DONE:
+                remaining -= 1
+            else:
+                yield item
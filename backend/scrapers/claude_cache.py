@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-hash cache for Claude classification results
+- Keyed by model + prompt template version + normalized post text hash
+- Stored in a MongoDB collection with a TTL index on created_at
+"""
+
+import hashlib
+import re
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace so trivially different reposts share a key"""
+    return _WHITESPACE.sub(' ', (text or '').lower()).strip()
+
+
+class AnalysisCache:
+    """
+    Persistent cache of analysis dicts. Only successful analyses are stored,
+    so failed calls are always retried on the next run.
+    """
+
+    def __init__(self, collection, model, prompt_version, ttl_days=90):
+        self.collection = collection
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl_seconds = int(ttl_days * 24 * 3600)
+        self.hits = 0
+        self.misses = 0
+
+    def ensure_indexes(self):
+        self.collection.create_index('created_at', expireAfterSeconds=self.ttl_seconds)
+
+    def key(self, text, estate):
+        # Estate is part of the prompt, so it is part of the key as well
+        digest = hashlib.sha256(f"{estate}\n{normalize_text(text)}".encode('utf-8')).hexdigest()
+        return f"{self.model}:v{self.prompt_version}:{digest}"
+
+    def get_many(self, items):
+        """Look up (text, estate) pairs in one query; analyses (or None) in the same order"""
+        keys = [self.key(text, estate) for text, estate in items]
+        if not keys:
+            return []
+        found = {doc['_id']: doc['analysis']
+                 for doc in self.collection.find({'_id': {'$in': keys}}, {'analysis': 1})}
+        self.hits += sum(key in found for key in keys)
+        self.misses += sum(key not in found for key in keys)
+        return [found.get(key) for key in keys]
+
+    def put(self, text, estate, analysis):
+        self.put_many([(text, estate, analysis)])
+
+    def put_many(self, items):
+        """Store (text, estate, analysis) triples in one bulk write, skipping failed analyses"""
+        ops = [
+            UpdateOne(
+                {'_id': self.key(text, estate)},
+                {'$set': {
+                    'model': self.model,
+                    'prompt_version': self.prompt_version,
+                    'analysis': analysis,
+                    'created_at': datetime.now()
+                }},
+                upsert=True
+            )
+            for text, estate, analysis in items
+            if analysis
+        ]
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rate-limit-aware scheduler for concurrent Claude requests
+- Keeps up to N requests in flight on the async Anthropic client
+- Token buckets for requests/minute and tokens/minute
+- Exponential backoff with jitter on 429 (rate limit) and 529 (overloaded)
+- stream(): same limits for a streamed reply, which the caller may cut off
+  as soon as it has what it needs
+"""
+
+import asyncio
+import random
+import time
+
+import anthropic
+
+RETRYABLE_STATUS_CODES = {429, 529}
+
+
+class TokenBucket:
+    """
+    Refilling bucket of `capacity` units per minute.
+    Balance may go negative when a charge is corrected upwards after the fact,
+    in which case later callers wait until the debt has refilled.
+    """
+
+    def __init__(self, capacity_per_minute):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(float(amount), self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, delta):
+        """Charge (positive) or refund (negative) units after a request completes"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class ClaudeScheduler:
+    """
+    Wraps `client.messages.create` so callers can fire requests freely:
+    concurrency, RPM/TPM budgets and retries are handled here.
+    """
+
+    def __init__(self, client, max_in_flight=8, requests_per_minute=50,
+                 tokens_per_minute=40000, max_retries=6, base_delay=1.0, max_delay=60.0):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.early_stops = 0
+
+    @staticmethod
+    def estimate_tokens(text, max_tokens=0):
+        """Rough token estimate (~4 chars per token) plus the output budget"""
+        return len(text) // 4 + max_tokens
+
+    def _backoff_delay(self, attempt, error):
+        retry_after = None
+        response = getattr(error, 'response', None)
+        if response is not None:
+            retry_after = response.headers.get('retry-after')
+        if retry_after:
+            try:
+                return min(self.max_delay, float(retry_after))
+            except ValueError:
+                pass
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def _account(self, usage, estimated_tokens, output_tokens=None):
+        """Record one finished request's usage; refund/charge the token bucket"""
+        self.requests += 1
+        if usage is None:
+            return
+        output_tokens = usage.output_tokens if output_tokens is None else output_tokens
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += output_tokens
+        self.token_bucket.adjust(usage.input_tokens + output_tokens - estimated_tokens)
+
+    async def create(self, estimated_tokens, **kwargs):
+        """Send one messages.create request under the scheduler's limits"""
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.request_bucket.acquire(1)
+                await self.token_bucket.acquire(estimated_tokens)
+
+                try:
+                    response = await self.client.messages.create(**kwargs)
+                except anthropic.APIStatusError as e:
+                    if e.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff_delay(attempt, e))
+                    continue
+
+                self._account(getattr(response, 'usage', None), estimated_tokens)
+                return response
+
+    async def stream(self, estimated_tokens, stop=None, **kwargs):
+        """
+        Send one streamed messages.create request under the scheduler's limits
+        and return the reply text. stop(chunk) is called with every text delta;
+        when it returns True the stream is closed without waiting for the rest.
+        """
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.request_bucket.acquire(1)
+                await self.token_bucket.acquire(estimated_tokens)
+
+                try:
+                    events = await self.client.messages.create(stream=True, **kwargs)
+                except anthropic.APIStatusError as e:
+                    if e.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff_delay(attempt, e))
+                    continue
+
+                parts = []
+                usage = None
+                output_tokens = 0
+                stopped = False
+                try:
+                    async for event in events:
+                        if event.type == 'message_start':
+                            usage = event.message.usage
+                        elif event.type == 'content_block_delta' and event.delta.type == 'text_delta':
+                            parts.append(event.delta.text)
+                            if stop is not None and stop(event.delta.text):
+                                stopped = True
+                                break
+                        elif event.type == 'message_delta':
+                            output_tokens = event.usage.output_tokens
+                finally:
+                    await events.close()
+
+                text = ''.join(parts)
+                if stopped:
+                    # The final usage event never arrived; count what was received
+                    self.early_stops += 1
+                    output_tokens = self.estimate_tokens(text)
+                self._account(usage, estimated_tokens, output_tokens=output_tokens)
+                return text
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Bounded pool of Selenium WebDriver instances
+- At most max_browsers Chrome processes alive at once (bounds memory)
+- Browsers are created lazily and reused across sites and across runs
+- Dead sessions are replaced transparently on checkout
+- Checkout can be bounded by a timeout
+"""
+
+import queue
+import threading
+import time
+
+# Longest single wait for an idle browser before the cap is re-checked
+WAIT_SLICE = 1.0
+
+
+class DriverPool:
+    def __init__(self, factory, max_browsers=2):
+        """
+        factory: zero-argument callable returning a new WebDriver
+        """
+        self.factory = factory
+        self.max_browsers = max_browsers
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self.lock:
+            self.created -= 1
+
+    def acquire(self, timeout=None):
+        """
+        Check out an idle browser, starting a new one if under the cap.
+        Raises TimeoutError if none is free within timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    can_create = self.created < self.max_browsers
+                    if can_create:
+                        self.created += 1
+                if can_create:
+                    try:
+                        return self.factory()
+                    except Exception:
+                        with self.lock:
+                            self.created -= 1
+                        raise
+
+                # Wait in short slices: a slot freed by a failed factory call or
+                # a discarded dead browser never shows up in the idle queue
+                wait = WAIT_SLICE
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        raise TimeoutError(f'no browser free within {timeout:.1f}s')
+                try:
+                    driver = self.idle.get(timeout=wait)
+                except queue.Empty:
+                    continue
+
+            if self._is_alive(driver):
+                return driver
+            self._discard(driver)
+
+    def release(self, driver):
+        self.idle.put(driver)
+
+    def close(self):
+        """Quit every idle browser"""
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
@@ -4,37 +4,35 @@ Google News RSS Scraper - ENHANCED
 Shows REAL source (99.co, PropertyGuru, etc.) instead of just "Google News"
 """
 
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-from pymongo import MongoClient
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import os
-from dotenv import load_dotenv
-import time
-from pathlib import Path
+from keyword_matcher import KeywordMatcher
+from scraper_resources import news_collection, check_connection, close_mongo
+from sentiment_service import shared_sentiment
+from article_pipeline import BulkSaver, EnrichmentPool, StreamStats, run_pipeline, ENRICH_PROCESSES
+from http_client import shared_client
+from article_cache import ArticleCache
+from url_utils import canonicalize_url
+from html_parsing import extract_article, iter_rss_items
+from scraper_state import SourceState
+from near_duplicates import shared_index
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+import threading
 
-project_root = Path(__file__).parent.parent.parent
-env_file = project_root / 'database' / 'scripts' / '.env'
+http = shared_client()
+sentiment = shared_sentiment()
 
-if env_file.exists():
-    load_dotenv(env_file)
+# Compressed on-disk cache of extracted (description, body text) per article URL
+article_cache = ArticleCache()
 
-# MongoDB
-MONGODB_URI = os.getenv('MONGODB_URI')
-MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'INF2006-Database_Systems')
+# Concurrent fetch stage: total workers and max in-flight requests per host
+FETCH_MAX_WORKERS = int(os.getenv('NEWS_FETCH_MAX_WORKERS', '8'))
+FETCH_PER_HOST_LIMIT = int(os.getenv('NEWS_FETCH_PER_HOST_LIMIT', '4'))
 
-try:
-    client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-    db = client[MONGODB_DB_NAME]
-    collection = db['newsarticles']
-    client.server_info()
-    print(f"✅ Connected to MongoDB: {MONGODB_DB_NAME}\n")
-except Exception as e:
-    print(f"❌ Connection failed: {e}")
-    exit(1)
-
-analyzer = SentimentIntensityAnalyzer()
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
 
 TOWNS = [
     'BISHAN', 'BUKIT MERAH', 'BUKIT TIMAH', 'CENTRAL AREA', 'GEYLANG', 'KALLANG','WHAMPOA', 'MARINE PARADE', 'QUEENSTOWN', 'TOA PAYOH',
@@ -45,6 +43,18 @@ TOWNS = [
     'LIM CHU KANG', 'SEMBAWANG', 'WOODLANDS', 'ADMIRALTY'
 ]
 
+# Category tags -> trigger words
+CATEGORY_RULES = {
+    ('mrt_expansion', 'infrastructure'): ['mrt', 'lrt', 'train', 'station', 'transport'],
+    ('new_development',): ['bto', 'launch', 'development', 'build'],
+    ('market_trend', 'price_analysis'): ['price', 'resale', 'market', 'sold', 'million', 'psf'],
+    ('policy_change',): ['policy', 'grant', 'scheme'],
+    ('buyer_guide',): ['guide', 'tips', 'advice'],
+    ('investment_insights',): ['investment', 'roi', 'rental'],
+}
+
+MATCHER = KeywordMatcher({'towns': TOWNS, **CATEGORY_RULES})
+
 # Map sources to their type and official URLs
 SOURCE_MAPPING = {
     # Property Portals
@@ -181,84 +191,37 @@ def identify_source(source_name, article_url):
 def extract_locations(text):
     if not text:
         return []
-    locations = set()
-    text_upper = text.upper()
-    for town in TOWNS:
-        if town in text_upper:
-            locations.add(town)
-    return list(locations)
+    return list(MATCHER.scan(text)['towns'])
 
 def fetch_article_content(url, timeout=8):
-    """Fetch article content to extract locations"""
+    """Fetch an article page; returns (description, body text) for the enrich stage"""
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = http.get(url, headers=headers, timeout=timeout)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove unwanted elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Find article content
-        article_selectors = ['article', '.article-content', '.story-body', 'main']
-        content_text = ""
-        
-        for selector in article_selectors:
-            article_elem = soup.select_one(selector)
-            if article_elem:
-                content_text = article_elem.get_text(separator=' ', strip=True)
-                break
-        
-        # Fallback: get paragraphs
-        if not content_text:
-            paragraphs = soup.find_all('p')
-            content_text = ' '.join([p.get_text(strip=True) for p in paragraphs[:15]])
-        
-        # Get description
-        description = ""
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            description = meta_desc['content']
-        elif paragraphs := soup.find_all('p', limit=2):
-            description = ' '.join([p.get_text(strip=True) for p in paragraphs])[:250]
+        # Parsed by the fastest installed backend (see html_parsing.py)
+        content_text, description = extract_article(response.content)
         
-        # Extract locations
-        locations = extract_locations(content_text)
-        
-        return description, locations
+        return description, content_text
         
     except Exception as e:
-        return "", []
+        return "", ""
 
 def categorize(title, description):
-    text = f"{title} {description}".lower()
-    cats = []
-    
-    if any(w in text for w in ['mrt', 'lrt', 'train', 'station', 'transport']):
-        cats.extend(['mrt_expansion', 'infrastructure'])
-    if any(w in text for w in ['bto', 'launch', 'development', 'build']):
-        cats.append('new_development')
-    if any(w in text for w in ['price', 'resale', 'market', 'sold', 'million', 'psf']):
-        cats.extend(['market_trend', 'price_analysis'])
-    if any(w in text for w in ['policy', 'grant', 'scheme']):
-        cats.append('policy_change')
-    if any(w in text for w in ['guide', 'tips', 'advice']):
-        cats.append('buyer_guide')
-    if any(w in text for w in ['investment', 'roi', 'rental']):
-        cats.append('investment_insights')
+    hits = MATCHER.scan(f"{title} {description}")
+    cats = [cat for rule in CATEGORY_RULES if hits[rule] for cat in rule]
     
     return list(set(cats)) if cats else ['general']
 
+def sentiment_text(item):
+    return item['title']
+
 def analyze_sentiment(title):
-    scores = analyzer.polarity_scores(title)
-    compound = scores['compound']
-    label = 'positive' if compound >= 0.1 else ('negative' if compound <= -0.1 else 'neutral')
-    return {'score': round(compound, 2), 'label': label}
+    return sentiment.score(title)
 
 def assess_impact(categories, sentiment, locations):
     high_positive = ['mrt_expansion', 'infrastructure', 'new_development']
@@ -281,11 +244,199 @@ def assess_impact(categories, sentiment, locations):
         'timeframe': timeframe
     }
 
-def scrape_google_news_rss():
-    """Scrape Google News RSS with real source attribution"""
+def _host_semaphore(url, per_host_limit):
+    """Shared semaphore capping concurrent requests to a single host"""
+    host = urlparse(url).netloc.lower()
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(per_host_limit)
+            _host_semaphores[host] = semaphore
+    return semaphore
+
+def fetch_with_host_limit(url, per_host_limit=FETCH_PER_HOST_LIMIT, refresh=False):
+    """
+    fetch_article_content() bounded by the per-host cap, served from the
+    on-disk article cache when possible
+    """
+    if not refresh:
+        cached = article_cache.get(url)
+        if cached is not None:
+            return cached
+    
+    with _host_semaphore(url, per_host_limit):
+        description, body = fetch_article_content(url)
+    
+    # Failed fetches come back empty; don't cache those
+    if description or body:
+        article_cache.put(url, description, body)
+    return description, body
+
+def load_known_urls(urls):
+    """One $in query for the URLs we already hold; returns the subset found"""
+    return {doc['url'] for doc in news_collection().find({'url': {'$in': list(urls)}}, {'url': 1})}
+
+def dedup_items(items, seen, refresh=False):
+    """
+    Dedup stage between RSS parsing and body fetching.
+    Canonicalizes each link, drops items already seen in this run and, unless
+    refresh=True, items already stored in newsarticles (under either their
+    canonical or their original link). Returns (new items, number dropped).
+    """
+    fresh = []
+    for item in items:
+        item['url'] = canonicalize_url(item['link'])
+        if item['url'] in seen:
+            continue
+        seen.add(item['url'])
+        fresh.append(item)
+    
+    if fresh and not refresh:
+        known = load_known_urls({item['url'] for item in fresh} | {item['link'] for item in fresh})
+        fresh = [item for item in fresh if item['url'] not in known and item['link'] not in known]
+    
+    return fresh, len(items) - len(fresh)
+
+def fetch_rss_items(rss_url, headers, limit=7, state=None):
+    """
+    Fetch one RSS feed and return its recent items as plain dicts.
+    With a SourceState, the scan stops at the first run of items seen in
+    earlier runs; unseen items are kept even if older than the high-water
+    mark, since the feed is ordered by relevance.
+    """
+    items = []
+    scan = state.scan() if state else None
+    
+    try:
+        response = http.get(rss_url, headers=headers, timeout=15, conditional=True,
+                            source=state.source if state else None)
+        if response.status_code == 304:
+            print(f"   ♻️  Feed not modified since last run, skipping\n")
+            return items
+        response.raise_for_status()
+        
+        for item in iter_rss_items(response.content, limit=limit):
+            try:
+                title = item['title']
+                link = item['link']
+                if title is None or link is None:
+                    continue
+                pub_date_str = item['pubDate']
+                rss_source_name = item['source'] or ''
+                
+                # Parse date
+                try:
+                    pub_date = datetime.strptime(pub_date_str, '%a, %d %b %Y %H:%M:%S %Z')
+                    parsed_date = pub_date
+                except:
+                    pub_date = datetime.now()
+                    parsed_date = None
+                
+                if scan and not scan.is_new(link, parsed_date):
+                    if scan.stopped:
+                        print(f"   ⏹️  Reached already-seen items, stopping feed\n")
+                        break
+                    continue
+                
+                # Skip if too old
+                if (datetime.now() - pub_date).days > 60:
+                    continue
+                
+                items.append({
+                    'title': title,
+                    'link': link,
+                    'pub_date': pub_date,
+                    'rss_source_name': rss_source_name
+                })
+                
+            except Exception as e:
+                continue
+    
+    except Exception as e:
+        print(f"   ❌ Error: {str(e)}\n")
+    
+    return items
+
+def build_article(item):
+    """Enrich stage: analyze a fetched RSS item and build the newsarticles document"""
+    title = item['title']
+    description = item['description']
+    locations_content = extract_locations(item['body'])
+    link = item['url']
+    pub_date = item['pub_date']
+    
+    # 🎯 IDENTIFY REAL SOURCE
+    real_source_name, real_source_url, source_type = identify_source(item['rss_source_name'], link)
+    
+    print(f"   📰 {title[:50]}...")
+    print(f"      🏢 Source: {real_source_name} ({source_type})")
+    
+    # Combine locations from title and content
+    locations_title = extract_locations(title)
+    all_locations = list(set(locations_content + locations_title))
+    if not all_locations:
+        all_locations = ['NATIONWIDE']
+    
+    print(f"      📍 {', '.join(all_locations)}")
+    
+    # Analyze
+    categories = categorize(title, description)
+    sentiment = item.get('sentiment') or analyze_sentiment(title)
+    impact = assess_impact(categories, sentiment, all_locations)
+    keywords = [w.lower() for w in title.split() if len(w) > 4][:10]
+    
+    emoji = '😊' if sentiment['label'] == 'positive' else ('😐' if sentiment['label'] == 'neutral' else '😞')
+    print(f"      {emoji} {sentiment['label']} ({sentiment['score']}) | 🏷️  {', '.join(categories[:2])}\n")
+    
+    # Set relevance score based on source type
+    relevance_scores = {
+        'government': 0.95,
+        'property_portal': 0.90,
+        'news_media': 0.85,
+        'news_aggregator': 0.80
+    }
+    
+    return {
+        'article_id': f"gnews-{int(pub_date.timestamp())}-{abs(hash(link)) % 100000}",
+        'title': title,
+        'description': description[:500] if description else f"Article from {real_source_name}",
+        'url': link,
+        'source': {
+            'name': real_source_name,  # 🎯 REAL SOURCE!
+            'url': real_source_url,
+            'type': source_type
+        },
+        'published_at': pub_date,
+        'locations': all_locations,
+        'categories': categories,
+        'sentiment': sentiment,
+        'impact_assessment': impact,
+        'keywords': keywords,
+        'relevance_score': relevance_scores.get(source_type, 0.85),
+        'view_count': 0,
+        'is_active': True,
+        'scraped_at': datetime.now(),
+        'last_updated': datetime.now()
+    }
+
+def scrape_google_news_rss(max_workers=FETCH_MAX_WORKERS, per_host_limit=FETCH_PER_HOST_LIMIT, refresh=False,
+                           state=None):
+    """
+    Scrape Google News RSS with real source attribution, yielding each
+    fetched item (with its description and body text) as it completes.
+    Feeds and article bodies are fetched on a bounded thread pool: each feed's
+    items are queued for fetching as soon as that feed is parsed, and each
+    article is analyzed as soon as its body arrives.
+    Each feed's items pass a dedup stage first: duplicates across feeds and
+    articles already in newsarticles are dropped before any body fetch,
+    unless refresh=True.
+    With a SourceState, each feed is only read down to already-seen items.
+    """
     print("🔍 Scraping Google News RSS feeds...\n")
+    print(f"   ⚡ {max_workers} workers, max {per_host_limit} per host\n")
     
-    articles = []
+    seen = set()
+    avoided = 0
     rss_urls = [
         'https://news.google.com/rss/search?q=Singapore+HDB+resale&hl=en-SG&gl=SG&ceid=SG:en',
         'https://news.google.com/rss/search?q=Singapore+HDB+BTO&hl=en-SG&gl=SG&ceid=SG:en',
@@ -294,169 +445,94 @@ def scrape_google_news_rss():
     
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
     
-    for rss_url in rss_urls:
-        try:
-            response = requests.get(rss_url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'xml')
-            items = soup.find_all('item', limit=7)  # Get more articles
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {
+            pool.submit(fetch_rss_items, rss_url, headers, state=state): ('feed', rss_url)
+            for rss_url in rss_urls
+        }
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
             
-            for item in items:
+            for future in done:
+                kind, payload = pending.pop(future)
+                
                 try:
-                    title = item.find('title').get_text(strip=True)
-                    link = item.find('link').get_text(strip=True)
-                    pub_date_str = item.find('pubDate').get_text(strip=True) if item.find('pubDate') else None
-                    
-                    # Get source from RSS
-                    source_elem = item.find('source')
-                    rss_source_name = source_elem.get_text(strip=True) if source_elem else ''
-                    
-                    # Parse date
-                    try:
-                        pub_date = datetime.strptime(pub_date_str, '%a, %d %b %Y %H:%M:%S %Z')
-                    except:
-                        pub_date = datetime.now()
-                    
-                    # Skip if too old
-                    if (datetime.now() - pub_date).days > 60:
-                        continue
-                    
-                    # 🎯 IDENTIFY REAL SOURCE
-                    real_source_name, real_source_url, source_type = identify_source(rss_source_name, link)
-                    
-                    print(f"   📰 {title[:50]}...")
-                    print(f"      🏢 Source: {real_source_name} ({source_type})")
-                    
-                    # Get locations from title
-                    locations_title = extract_locations(title)
-                    
-                    # Fetch article content
-                    print(f"      🔗 Fetching content...", end='')
-                    description, locations_content = fetch_article_content(link)
-                    
-                    # Combine locations
-                    all_locations = list(set(locations_content + locations_title))
-                    if not all_locations:
-                        all_locations = ['NATIONWIDE']
-                    
-                    print(f" 📍 {', '.join(all_locations)}")
-                    
-                    # Analyze
-                    categories = categorize(title, description)
-                    sentiment = analyze_sentiment(title)
-                    impact = assess_impact(categories, sentiment, all_locations)
-                    keywords = [w.lower() for w in title.split() if len(w) > 4][:10]
-                    
-                    emoji = '😊' if sentiment['label'] == 'positive' else ('😐' if sentiment['label'] == 'neutral' else '😞')
-                    print(f"      {emoji} {sentiment['label']} ({sentiment['score']}) | 🏷️  {', '.join(categories[:2])}\n")
-                    
-                    # Set relevance score based on source type
-                    relevance_scores = {
-                        'government': 0.95,
-                        'property_portal': 0.90,
-                        'news_media': 0.85,
-                        'news_aggregator': 0.80
-                    }
-                    
-                    article_data = {
-                        'article_id': f"gnews-{int(pub_date.timestamp())}-{abs(hash(link)) % 100000}",
-                        'title': title,
-                        'description': description[:500] if description else f"Article from {real_source_name}",
-                        'url': link,
-                        'source': {
-                            'name': real_source_name,  # 🎯 REAL SOURCE!
-                            'url': real_source_url,
-                            'type': source_type
-                        },
-                        'published_at': pub_date,
-                        'locations': all_locations,
-                        'categories': categories,
-                        'sentiment': sentiment,
-                        'impact_assessment': impact,
-                        'keywords': keywords,
-                        'relevance_score': relevance_scores.get(source_type, 0.85),
-                        'view_count': 0,
-                        'is_active': True,
-                        'scraped_at': datetime.now(),
-                        'last_updated': datetime.now()
-                    }
-                    
-                    articles.append(article_data)
-                    
+                    if kind == 'feed':
+                        items, dropped = dedup_items(future.result(), seen, refresh)
+                        avoided += dropped
+                        
+                        for item in items:
+                            fetch = pool.submit(fetch_with_host_limit, item['url'], per_host_limit, refresh)
+                            pending[fetch] = ('article', item)
+                    else:
+                        payload['description'], payload['body'] = future.result()
+                        yield payload
                 except Exception as e:
                     continue
-            
-            time.sleep(2)
-            
-        except Exception as e:
-            print(f"   ❌ Error: {str(e)}\n")
     
-    return articles
-
-def save_to_mongodb(articles):
-    if not articles:
-        return 0
-    
-    print(f"\n💾 Saving {len(articles)} articles...")
-    
-    saved = 0
-    updated = 0
-    
-    for article in articles:
-        try:
-            if collection.find_one({'url': article['url']}):
-                collection.update_one(
-                    {'url': article['url']},
-                    {'$set': {'last_updated': datetime.now(), 'locations': article['locations']}}
-                )
-                updated += 1
-            else:
-                collection.insert_one(article)
-                saved += 1
-        except Exception as e:
-            print(f"   ⚠️  Error: {str(e)}")
-    
-    print(f"   ✅ Saved: {saved} | 🔄 Updated: {updated}")
-    return saved
+    print(f"   ♻️  Fetches avoided by dedup: {avoided} | "
+          f"Article cache: {article_cache.hits} hits / {article_cache.misses} misses\n")
 
 def main():
+    parser = argparse.ArgumentParser(description='Google News RSS scraper')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Refetch article bodies even if already stored or cached')
+    parser.add_argument('--enrich-processes', type=int, default=ENRICH_PROCESSES,
+                        help='Worker processes for text analysis (0 = inline)')
+    args = parser.parse_args()
+    
+    try:
+        check_connection()
+    except Exception as e:
+        print(f"❌ Connection failed: {e}")
+        exit(1)
+    
     print("\n" + "="*70)
     print("🗞️  GOOGLE NEWS SCRAPER - REAL SOURCE ATTRIBUTION")
     print("   Shows actual source: 99.co, PropertyGuru, CNA, etc.")
     print("="*70)
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
-    articles = scrape_google_news_rss()
+    # Existing articles only get their locations and timestamp refreshed
+    saver = BulkSaver(news_collection(), key='url', update_fields=['last_updated', 'locations'])
+    stats = StreamStats(source_label=lambda a: f"{a['source']['name']} ({a['source']['type']})")
+    state = SourceState('google_rss', fresh=args.refresh)
+    articles = scrape_google_news_rss(refresh=args.refresh, state=state)
+    near_dups = shared_index('news')
+    enrich_pool = EnrichmentPool(args.enrich_processes) if args.enrich_processes else None
+    try:
+        run_pipeline(articles, saver, key='url', enrich=build_article, stats=stats,
+                     pool=enrich_pool, near_dups=near_dups, sentiment_text=sentiment_text)
+    finally:
+        if enrich_pool:
+            enrich_pool.close()
+    saver.close()
+    
+    # Results are saved, so later runs may skip unchanged feeds
+    if saver.counts['failed']:
+        print("\n⚠️  Some saves failed; crawl state not advanced")
+        http.discard_validators(state.source)
+    else:
+        state.save()
+        http.commit_validators(state.source)
     
     print("\n" + "="*70)
-    print(f"📈 Found {len(articles)} articles")
+    print(f"📈 Found {stats.total} articles")
     
-    if articles:
-        stats = {}
-        for a in articles:
-            stats[a['sentiment']['label']] = stats.get(a['sentiment']['label'], 0) + 1
-        
-        print(f"\n😊 Sentiment:")
-        print(f"   Positive: {stats.get('positive', 0)} | "
-              f"Neutral: {stats.get('neutral', 0)} | "
-              f"Negative: {stats.get('negative', 0)}")
+    if stats.total:
+        stats.print_summary()
+        saver.print_counts()
         
-        # Show by source
-        sources = {}
-        for a in articles:
-            src = f"{a['source']['name']} ({a['source']['type']})"
-            sources[src] = sources.get(src, 0) + 1
-        
-        print(f"\n📊 By Source:")
-        for src, count in sorted(sources.items(), key=lambda x: x[1], reverse=True):
-            print(f"   {src}: {count} articles")
-        
-        save_to_mongodb(articles)
-        
-        print(f"\n📦 Total in database: {collection.count_documents({})}")
+        print(f"\n📦 Total in database: {news_collection().count_documents({})}")
+    
+    http.print_stats()
+    sentiment.print_stats()
+    near_dups.print_stats()
+    article_cache.close()
+    near_dups.close()
     
-    client.close()
+    close_mongo()
     print(f"\n✅ Done! {datetime.now().strftime('%H:%M:%S')}")
     print("="*70 + "\n")
 
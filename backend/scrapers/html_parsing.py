@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Pluggable HTML/RSS parsing layer for the requests-based scrapers
+- HTML backends: selectolax > lxml > BeautifulSoup('html.parser'), whichever
+  is installed first (override with SCRAPER_HTML_PARSER)
+- Each helper returns only what the scrapers read, with the same text
+  semantics as the BeautifulSoup code it replaces
+- RSS is parsed with a streaming iterparse that stops after `limit` items
+"""
+
+import io
+import os
+import xml.etree.ElementTree as ElementTree
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+    import lxml.etree
+except ImportError:
+    lxml = None
+
+from bs4 import BeautifulSoup
+
+UNWANTED_TAGS = ['script', 'style', 'nav', 'footer', 'header']
+ARTICLE_SELECTORS = ['article', '.article-content', '.story-body', 'main']
+
+
+def available_backends():
+    backends = []
+    if HTMLParser is not None:
+        backends.append('selectolax')
+    if lxml is not None:
+        backends.append('lxml')
+    backends.append('bs4')
+    return backends
+
+
+def default_backend():
+    forced = os.getenv('SCRAPER_HTML_PARSER')
+    if forced in available_backends():
+        return forced
+    return available_backends()[0]
+
+
+BACKEND = default_backend()
+
+
+# ---------- text helpers (BeautifulSoup get_text semantics) ----------
+
+def _join(parts, separator):
+    return separator.join(part.strip() for part in parts if part.strip())
+
+
+def _lxml_text(node, separator=''):
+    # .//text() skips comments, like BeautifulSoup's get_text()
+    return _join(node.xpath('.//text()'), separator)
+
+
+def _selectolax_text(node, separator=''):
+    return _join(node.text(deep=True, separator='\x00', strip=True).split('\x00'), separator)
+
+
+_UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_LOWER = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def _css_to_xpath(selector, axis='//'):
+    """Only the simple selectors used here: 'tag', '.class' or 'tag.class'"""
+    tag, _, cls = selector.partition('.')
+    if not cls:
+        return f"{axis}{tag}"
+    return f"{axis}{tag or '*'}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+
+# ---------- article bodies ----------
+
+def extract_article(content, backend=None):
+    """
+    Return (content_text, description) from an article page, as
+    fetch_article_content() computed it with BeautifulSoup
+    """
+    backend = backend or BACKEND
+
+    if backend == 'selectolax':
+        tree = HTMLParser(content)
+        for node in tree.css(', '.join(UNWANTED_TAGS)):
+            node.decompose()
+
+        content_text = ''
+        for selector in ARTICLE_SELECTORS:
+            node = tree.css_first(selector)
+            if node is not None:
+                content_text = _selectolax_text(node, ' ')
+                break
+        paragraphs = tree.css('p')
+        if not content_text:
+            content_text = ' '.join(_selectolax_text(p) for p in paragraphs[:15])
+
+        meta = tree.css_first('meta[name="description"]')
+        description = meta.attributes.get('content') if meta is not None else None
+        if not description and paragraphs:
+            description = ' '.join(_selectolax_text(p) for p in paragraphs[:2])[:250]
+        return content_text, description or ''
+
+    if backend == 'lxml':
+        doc = lxml.html.fromstring(content)
+        for node in doc.xpath(' | '.join(f'//{tag}' for tag in UNWANTED_TAGS)):
+            node.drop_tree()
+
+        content_text = ''
+        for selector in ARTICLE_SELECTORS:
+            nodes = doc.xpath(_css_to_xpath(selector))
+            if nodes:
+                content_text = _lxml_text(nodes[0], ' ')
+                break
+        paragraphs = doc.xpath('//p')
+        if not content_text:
+            content_text = ' '.join(_lxml_text(p) for p in paragraphs[:15])
+
+        metas = doc.xpath('//meta[@name="description"]/@content')
+        description = metas[0] if metas else None
+        if not description and paragraphs:
+            description = ' '.join(_lxml_text(p) for p in paragraphs[:2])[:250]
+        return content_text, description or ''
+
+    soup = BeautifulSoup(content, 'html.parser')
+    for node in soup(UNWANTED_TAGS):
+        node.decompose()
+
+    content_text = ''
+    for selector in ARTICLE_SELECTORS:
+        node = soup.select_one(selector)
+        if node:
+            content_text = node.get_text(separator=' ', strip=True)
+            break
+    if not content_text:
+        paragraphs = soup.find_all('p')
+        content_text = ' '.join([p.get_text(strip=True) for p in paragraphs[:15]])
+
+    description = ''
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and meta_desc.get('content'):
+        description = meta_desc['content']
+    elif paragraphs := soup.find_all('p', limit=2):
+        description = ' '.join([p.get_text(strip=True) for p in paragraphs])[:250]
+    return content_text, description
+
+
+# ---------- listing pages ----------
+
+def iter_links(content, href_contains=None, backend=None):
+    """
+    Yield (text, href) for every <a href> on the page. With href_contains,
+    only links whose href contains it (case-insensitive) are matched, in the
+    parser's selector rather than in Python.
+    """
+    backend = backend or BACKEND
+    selector = f'a[href*="{href_contains}" i]' if href_contains else 'a[href]'
+
+    if backend == 'selectolax':
+        for node in HTMLParser(content).css(selector):
+            yield _selectolax_text(node), node.attributes.get('href') or ''
+    elif backend == 'lxml':
+        xpath = '//a[@href]'
+        if href_contains:
+            xpath = (f"//a[contains(translate(@href, '{_UPPER}', '{_LOWER}'), "
+                     f"'{href_contains.lower()}')]")
+        for node in lxml.html.fromstring(content).xpath(xpath):
+            yield _lxml_text(node), node.get('href')
+    else:
+        for node in BeautifulSoup(content, 'html.parser').select(selector):
+            yield node.get_text(strip=True), node['href']
+
+
+def item_links(content, item, heading, backend=None):
+    """
+    One entry per element matching `item` (e.g. 'li.item'): (text, href) of
+    the first <a href> inside its first `heading` (e.g. 'h5.title'), or None
+    """
+    backend = backend or BACKEND
+    links = []
+
+    if backend == 'selectolax':
+        for node in HTMLParser(content).css(item):
+            title = node.css_first(heading)
+            link = title.css_first('a[href]') if title is not None else None
+            links.append((_selectolax_text(link), link.attributes.get('href') or '') if link is not None else None)
+    elif backend == 'lxml':
+        for node in lxml.html.fromstring(content).xpath(_css_to_xpath(item)):
+            titles = node.xpath(_css_to_xpath(heading, './/'))
+            anchors = titles[0].xpath('.//a[@href]') if titles else []
+            links.append((_lxml_text(anchors[0]), anchors[0].get('href')) if anchors else None)
+    else:
+        for node in BeautifulSoup(content, 'html.parser').select(item):
+            title = node.select_one(heading)
+            link = title.find('a', href=True) if title else None
+            links.append((link.get_text(strip=True), link['href']) if link else None)
+
+    return links
+
+
+# ---------- RSS ----------
+
+def iter_rss_items(content, limit=None):
+    """
+    Stream <item> elements out of an RSS document, stopping after `limit`.
+    Yields dicts with title, link, pubDate and source (None when missing).
+    """
+    parse = lxml.etree.iterparse if lxml is not None else ElementTree.iterparse
+    count = 0
+
+    for _, elem in parse(io.BytesIO(content), events=('end',)):
+        if elem.tag != 'item':
+            continue
+
+        def child_text(tag):
+            child = elem.find(tag)
+            return (child.text or '').strip() if child is not None else None
+
+        yield {
+            'title': child_text('title'),
+            'link': child_text('link'),
+            'pubDate': child_text('pubDate'),
+            'source': child_text('source')
+        }
+
+        elem.clear()
+        count += 1
+        if limit and count >= limit:
+            return
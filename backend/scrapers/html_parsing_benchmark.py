@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+HTML parsing backend benchmark
+Parses saved fixture pages with every installed backend (selectolax, lxml,
+BeautifulSoup) and reports parse time, peak memory and whether each backend
+extracts the same data as BeautifulSoup.
+
+Fixtures are plain files in the fixture directory, named by page type:
+  rss_*.xml       Google News RSS feeds      (iter_rss_items; the bs4 row
+                                              uses the old BeautifulSoup(..., 'xml')
+                                              parse, so it is the baseline)
+  listing_*.html  HDB / URA listing pages     (iter_links)
+  lta_*.html      LTA newsroom page           (item_links)
+  article_*.html  news article pages          (extract_article)
+
+Usage: python html_parsing_benchmark.py [--save] [--fixtures DIR] [--iterations N]
+"""
+
+import argparse
+import multiprocessing
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: no getrusage, only tracemalloc is reported
+
+from bs4 import BeautifulSoup
+
+import html_parsing
+from html_parsing import available_backends, extract_article, iter_links, item_links, iter_rss_items
+from http_client import shared_client
+from scraper_resources import CACHE_DIR
+
+FIXTURE_DIR = CACHE_DIR / 'fixtures'
+
+FIXTURE_SOURCES = {
+    'listing_hdb.html': 'https://www.hdb.gov.sg/about-us/news-and-publications/press-releases',
+    'listing_ura.html': 'https://www.ura.gov.sg/Corporate/Media-Room/Media-Releases',
+    'lta_newsroom.html': 'https://www.lta.gov.sg/content/ltagov/en/newsroom.html',
+    'rss_hdb.xml': 'https://news.google.com/rss/search?q=HDB+Singapore&hl=en-SG&gl=SG&ceid=SG:en',
+    'rss_property.xml': 'https://news.google.com/rss/search?q=Singapore+property+market&hl=en-SG&gl=SG&ceid=SG:en',
+}
+
+# Listing fixture -> href filter the scraper pushes into the link selector
+LISTING_FILTERS = {
+    'listing_ura.html': 'media-releases',
+}
+
+
+def save_fixtures(fixture_dir):
+    """Download the listing pages, feeds and the first few articles they link to"""
+    http = shared_client()
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+
+    for name, url in FIXTURE_SOURCES.items():
+        try:
+            response = http.get(url, timeout=15)
+            response.raise_for_status()
+            (fixture_dir / name).write_bytes(response.content)
+            print(f"   ✅ {name} ({len(response.content) / 1024:.1f} KB)")
+        except Exception as e:
+            print(f"   ❌ {name}: {e}")
+
+    feed = fixture_dir / 'rss_property.xml'
+    if feed.exists():
+        for i, item in enumerate(iter_rss_items(feed.read_bytes(), limit=5)):
+            try:
+                response = http.get(item['link'], timeout=15)
+                response.raise_for_status()
+                (fixture_dir / f'article_{i}.html').write_bytes(response.content)
+                print(f"   ✅ article_{i}.html ({len(response.content) / 1024:.1f} KB)")
+            except Exception as e:
+                print(f"   ❌ article_{i}.html: {e}")
+
+
+def bs4_rss_items(content):
+    """The RSS parse google_news_scraper used before iter_rss_items"""
+    def child_text(item, tag):
+        child = item.find(tag)
+        return child.get_text(strip=True) if child is not None else None
+
+    return [
+        {tag: child_text(item, tag) for tag in ('title', 'link', 'pubDate', 'source')}
+        for item in BeautifulSoup(content, 'xml').find_all('item')
+    ]
+
+
+def parse_fixture(name, content, backend):
+    if name.startswith('rss_'):
+        return bs4_rss_items(content) if backend == 'bs4' else list(iter_rss_items(content))
+    if name.startswith('listing_'):
+        return list(iter_links(content, href_contains=LISTING_FILTERS.get(name), backend=backend))
+    if name.startswith('lta_'):
+        return item_links(content, 'li.item', 'h5.title', backend=backend)
+    return extract_article(content, backend=backend)
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process (KB on Linux), None where unavailable"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_backend(backend, fixtures, iterations, results):
+    """Runs in a fresh child process so peak RSS belongs to this backend only"""
+    # Warm up imports and parser initialisation before measuring memory
+    for name, content in fixtures:
+        parse_fixture(name, content, backend)
+    rss_before = peak_rss_kb()
+
+    tracemalloc.start()
+    outputs = {name: parse_fixture(name, content, backend) for name, content in fixtures}
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = float('inf')
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for name, content in fixtures:
+            parse_fixture(name, content, backend)
+        best = min(best, time.perf_counter() - start)
+
+    rss_growth = peak_rss_kb() - rss_before if rss_before is not None else None
+    results[backend] = {'seconds': best, 'py_peak': py_peak, 'rss_growth_kb': rss_growth, 'outputs': outputs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parsing backends")
+    parser.add_argument('--save', action='store_true', help="download fresh fixture pages first")
+    parser.add_argument('--fixtures', type=Path, default=FIXTURE_DIR)
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.save:
+        print(f"📥 Saving fixtures to {args.fixtures}")
+        save_fixtures(args.fixtures)
+
+    fixtures = sorted(
+        (path.name, path.read_bytes())
+        for path in args.fixtures.glob('*') if path.suffix in ('.html', '.xml')
+    ) if args.fixtures.exists() else []
+
+    if not fixtures:
+        print(f"No fixtures in {args.fixtures} - run with --save first.")
+        return
+
+    results = multiprocessing.Manager().dict()
+    for backend in available_backends():
+        process = multiprocessing.Process(target=run_backend, args=(backend, fixtures, args.iterations, results))
+        process.start()
+        process.join()
+
+    total_kb = sum(len(content) for _, content in fixtures) / 1024
+    baseline = results.get('bs4')
+
+    print("=" * 70)
+    print("HTML PARSING BENCHMARK")
+    print("=" * 70)
+    print(f"  Fixtures: {len(fixtures)} ({total_kb:.1f} KB) | Iterations: {args.iterations} (best run reported)")
+    print(f"  Default backend: {html_parsing.BACKEND}\n")
+
+    for backend in available_backends():
+        if backend not in results:
+            print(f"  {backend:<11} ❌ failed")
+            continue
+        result = results[backend]
+        speedup = f"{baseline['seconds'] / result['seconds']:.2f}x" if baseline else "-"
+        mismatches = [
+            name for name, output in result['outputs'].items()
+            if baseline and output != baseline['outputs'][name]
+        ]
+        rss = f"{result['rss_growth_kb']:6d} KB" if result['rss_growth_kb'] is not None else "   n/a"
+        print(f"  {backend:<11} {result['seconds'] * 1000:8.2f} ms | speedup vs bs4: {speedup:>6} | "
+              f"Python peak: {result['py_peak'] / 1024:8.1f} KB | RSS growth: {rss}")
+        if mismatches:
+            print(f"              ⚠️  output differs from bs4 on: {', '.join(mismatches)}")
+
+    print("\n  Python peak is tracemalloc (Python objects only); RSS growth also counts")
+    print("  C-level parser memory, measured in a fresh process per backend.")
+    print("  RSS feeds: the bs4 row times the old BeautifulSoup(..., 'xml') parse.")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Shared pooled HTTP client for the requests-based scrapers
+- One keep-alive connection pool per process (HTTP/2 via httpx when installed)
+- Conditional GETs: ETag / Last-Modified validators persisted in a local
+  SQLite file and replayed as If-None-Match / If-Modified-Since
+- Per-run stats: requests, body bytes transferred, 304 ratio
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+except ImportError:
+    httpx = None
+
+from scraper_resources import CACHE_DIR
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '16'))
+
+
+class ValidatorStore:
+    """
+    url -> (etag, last_modified), kept in SQLite.
+    New validators are staged in memory per source and only written by
+    commit(source), so a source whose results were not fully saved (or a run
+    that crashes) refetches the same pages in full next time.
+    """
+
+    def __init__(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS validators (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)'
+        )
+        self.lock = threading.Lock()
+        self.staged = {}
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified FROM validators WHERE url = ?', (url,)
+            ).fetchone()
+        return row or (None, None)
+
+    def stage(self, url, etag, last_modified, source=None):
+        if etag or last_modified:
+            with self.lock:
+                self.staged.setdefault(source, {})[url] = (etag, last_modified)
+
+    def commit(self, source=None):
+        with self.lock:
+            staged = self.staged.pop(source, {})
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO validators (url, etag, last_modified) VALUES (?, ?, ?)',
+                [(url, etag, modified) for url, (etag, modified) in staged.items()]
+            )
+            self.conn.commit()
+
+    def discard(self, source=None):
+        with self.lock:
+            self.staged.pop(source, None)
+
+
+class HttpClient:
+    def __init__(self, validator_path=CACHE_DIR / 'http_validators.sqlite', pool_size=POOL_SIZE):
+        if httpx is not None:
+            self.backend = 'httpx/http2'
+            self.session = httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                headers=DEFAULT_HEADERS,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        else:
+            self.backend = 'requests/http1.1'
+            self.session = requests.Session()
+            self.session.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+        self.validators = ValidatorStore(Path(validator_path))
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'requests': 0, 'bytes': 0, 'conditional': 0, 'not_modified': 0}
+
+    def get(self, url, headers=None, timeout=15, conditional=False, source=None):
+        """
+        GET through the shared pool. With conditional=True, stored validators
+        are sent and a 304 response comes back with an empty body; new
+        validators are staged under source until commit_validators(source).
+        """
+        request_headers = dict(headers or {})
+
+        if conditional:
+            etag, last_modified = self.validators.get(url)
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+
+        response = self.session.get(url, headers=request_headers, timeout=timeout)
+
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(response.content)
+            if conditional:
+                self.stats['conditional'] += 1
+                if response.status_code == 304:
+                    self.stats['not_modified'] += 1
+
+        if conditional and response.status_code == 200:
+            self.validators.stage(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), source)
+
+        return response
+
+    def commit_validators(self, source=None):
+        """Persist a source's validators from this run; call once its results are all saved"""
+        self.validators.commit(source)
+
+    def discard_validators(self, source=None):
+        """Forget a source's validators from this run, e.g. after a failed or partial scrape"""
+        self.validators.discard(source)
+
+    def print_stats(self):
+        conditional = self.stats['conditional']
+        ratio = (self.stats['not_modified'] / conditional * 100) if conditional else 0.0
+        print(f"\n🌐 HTTP ({self.backend}): {self.stats['requests']} requests | "
+              f"{self.stats['bytes'] / 1024:.1f} KB | "
+              f"304 Not Modified: {self.stats['not_modified']}/{conditional} ({ratio:.0f}%)")
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_client():
+    """The process-wide HttpClient, created on first use"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+    return _shared_client
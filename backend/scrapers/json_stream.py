@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental parser for one JSON value arriving in chunks (a streamed reply)
+- Skips any preamble (prose, a ```json fence) up to the first '{' or '['
+- Tracks nesting depth and string/escape state chunk by chunk, so it knows
+  the moment the top-level value is closed and the stream can be dropped
+"""
+
+import json
+
+
+class JsonStreamParser:
+    def __init__(self, opener='{'):
+        """
+        opener: '{' for an object, '[' for an array
+        """
+        self.opener = opener
+        self.closer = '}' if opener == '{' else ']'
+        self.buffer = []
+        self.started = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.done = False
+
+    def feed(self, chunk):
+        """Consume a chunk; returns True once the top-level value is complete"""
+        if self.done:
+            return True
+
+        for char in chunk:
+            if not self.started:
+                if char != self.opener:
+                    continue
+                self.started = True
+
+            self.buffer.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+                    return True
+        return False
+
+    def result(self):
+        """The parsed value, or None if it never closed or is not valid JSON"""
+        if not self.done:
+            return None
+        try:
+            return json.loads(''.join(self.buffer))
+        except json.JSONDecodeError:
+            return None
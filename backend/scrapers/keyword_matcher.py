@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Single-pass multi-dictionary keyword matcher
+- All keyword lists (towns, required/excluded keywords, category words, ...)
+  are compiled into ONE regex at import time
+- scan(text) returns the hits for every dictionary from one pass over the text
+- Keywords match case-insensitively at the start of a word, so 'unit' no longer
+  fires inside 'community', while plurals like 'flats' still match 'flat'
+"""
+
+import re
+from functools import lru_cache
+
+
+def _trie_pattern(keys):
+    """
+    Build a regex equivalent to 'k1|k2|...' but factored as a character trie,
+    so the engine never re-reads a shared prefix. Greedy optional groups make
+    it return the longest keyword at each position.
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    def __init__(self, dictionaries):
+        """
+        dictionaries: {name: [keyword, ...]}
+        """
+        self.names = list(dictionaries)
+        # lowercase keyword -> {(dictionary index, position in list, original keyword)}
+        owners = {}
+
+        for index, keywords in enumerate(dictionaries.values()):
+            seen = set()
+            for position, keyword in enumerate(keywords):
+                key = keyword.lower()
+                if key not in seen:
+                    seen.add(key)
+                    owners.setdefault(key, set()).add((index, position, keyword))
+
+        keys = sorted(owners, key=len, reverse=True)
+
+        # The regex reports only the longest keyword starting at each position;
+        # every shorter keyword that is a prefix of it matches there too.
+        self.expansions = {
+            key: frozenset().union(*(owners[other] for other in keys if key.startswith(other)))
+            for key in keys
+        }
+
+        # Zero-width lookahead so overlapping keywords are all reported
+        self.pattern = re.compile(rf"(?<!\w)(?=({_trie_pattern(keys)}))")
+        self._scan = lru_cache(maxsize=1024)(self._scan_uncached)
+
+    def _scan_uncached(self, text):
+        entries = set()
+        for key in set(self.pattern.findall(text.lower())):
+            entries |= self.expansions[key]
+
+        hits = dict.fromkeys(self.names, ())
+        # Sorting by (dictionary, position) preserves each dictionary's own ordering
+        for index, _, keyword in sorted(entries):
+            hits[self.names[index]] += (keyword,)
+        return hits
+
+    def scan(self, text):
+        """
+        Return {dictionary name: tuple of matched keywords in dictionary order}.
+        Results are memoized, so callers that look at the same text through
+        several helpers only pay for one pass.
+        """
+        return self._scan(text or '')
+
+    def cache_clear(self):
+        self._scan.cache_clear()
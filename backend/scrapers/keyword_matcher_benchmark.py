@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Keyword matcher micro-benchmark
+Compares the old per-list substring scans against the compiled KeywordMatcher
+on articles already stored in the newsarticles collection.
+
+Usage: python keyword_matcher_benchmark.py [max_articles] [iterations]
+"""
+
+import sys
+import time
+
+from official_sources_scraper import TOWNS, REQUIRED_KEYWORDS, EXCLUDED_KEYWORDS, CATEGORY_RULES
+from scraper_resources import news_collection, close_mongo
+from keyword_matcher import KeywordMatcher
+
+
+def substring_scan(title, description):
+    """What the scrapers did before: one substring scan per keyword list"""
+    text = f"{title} {description}".lower()
+    excluded = [kw for kw in EXCLUDED_KEYWORDS if kw.lower() in text]
+    required = [kw for kw in REQUIRED_KEYWORDS if kw in text]
+    cats = [cat for rule, words in CATEGORY_RULES.items() if any(w in text for w in words) for cat in rule]
+    locations = [town for town in TOWNS if town in title.upper()]
+    return excluded, required, cats, locations
+
+
+def matcher_scan(matcher, title, description):
+    hits = matcher.scan(f"{title} {description}")
+    cats = [cat for rule in CATEGORY_RULES if hits[rule] for cat in rule]
+    locations = matcher.scan(title)['towns']
+    return hits['excluded'], hits['required'], cats, locations
+
+
+def time_it(fn, corpus, iterations, before_each=None):
+    best = float('inf')
+    for _ in range(iterations):
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        for title, description in corpus:
+            fn(title, description)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    max_articles = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    corpus = [
+        (doc.get('title', ''), doc.get('description', ''))
+        for doc in news_collection().find({}, {'title': 1, 'description': 1}).limit(max_articles)
+    ]
+    close_mongo()
+
+    if not corpus:
+        print("No articles in newsarticles - run a scraper first.")
+        return
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher({
+        'towns': TOWNS,
+        'required': REQUIRED_KEYWORDS,
+        'excluded': EXCLUDED_KEYWORDS,
+        **CATEGORY_RULES
+    })
+    build_ms = (time.perf_counter() - start) * 1000
+
+    baseline = time_it(substring_scan, corpus, iterations)
+    compiled = time_it(lambda t, d: matcher_scan(matcher, t, d), corpus, iterations,
+                       before_each=matcher.cache_clear)
+
+    disagreements = sum(
+        1 for title, description in corpus
+        if set(substring_scan(title, description)[1]) != set(matcher_scan(matcher, title, description)[1])
+    )
+
+    print("=" * 70)
+    print("KEYWORD MATCHER BENCHMARK")
+    print("=" * 70)
+    print(f"  Articles: {len(corpus)} | Iterations: {iterations} (best run reported)")
+    print(f"  Matcher build time: {build_ms:.2f} ms")
+    print(f"\n  Substring scans: {baseline * 1000:.2f} ms total | "
+          f"{baseline / len(corpus) * 1e6:.1f} µs/article")
+    print(f"  KeywordMatcher:  {compiled * 1000:.2f} ms total | "
+          f"{compiled / len(corpus) * 1e6:.1f} µs/article")
+    print(f"  Speedup: {baseline / compiled:.2f}x")
+    print(f"\n  Articles whose required-keyword hits differ (word-start matching): {disagreements}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
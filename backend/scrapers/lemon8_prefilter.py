@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local first-stage filter for Lemon8 posts, run before Claude
+- Stage 1, rules: off-topic keywords/hashtags (makeup, snacks, giveaways, ...)
+  with no housing vocabulary at all -> rejected
+- Stage 2, model: hashed TF-IDF features + logistic regression, trained from
+  stored reviews (positive) and lemon8_dirty_data (negative); posts it is
+  confident are not reviews -> rejected
+- Everything else goes to Claude, which also extracts sentiment, key points,
+  pros and cons for the reviews, so likely reviews are escalated too
+Pure Python, no extra dependencies; the model is a small JSON file.
+
+Usage: python lemon8_prefilter.py   (retrain from MongoDB and report holdout precision)
+"""
+
+import json
+import math
+import os
+import random
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from keyword_matcher import KeywordMatcher
+from scraper_resources import CACHE_DIR
+
+MODEL_PATH = CACHE_DIR / 'lemon8_prefilter.json'
+
+# Posts scoring below this P(review) are rejected without a Claude call
+REJECT_BELOW = float(os.getenv('LEMON8_PREFILTER_REJECT_BELOW', '0.1'))
+MIN_EXAMPLES = 50
+FEATURE_BITS = 18
+EPOCHS = 8
+LEARNING_RATE = 0.5
+L2 = 1e-5
+
+# Dirty-data reasons that are not Claude's judgement of the content
+UNLABELED_REASONS = re.compile(r'^(Failed to analyze|Near-duplicate|Pre-filter)')
+
+HOUSING_TERMS = [
+    'hdb', 'bto', 'flat', 'resale', 'estate', 'neighbour', 'neighbor', 'void deck',
+    'town council', 'block', 'apartment', 'condo', 'home', 'house', 'housing',
+    'living', 'live', 'stay', 'moved', 'move in', 'renovation', 'reno',
+    'room', 'unit', 'rent', 'mrt', 'amenities', 'hawker', 'kopitiam', 'neighbourhood',
+    'neighborhood', 'area', 'town', 'precinct', 'corridor', 'lift'
+]
+OFF_TOPIC_TERMS = [
+    'makeup', 'make up', 'skincare', 'skin care', 'lipstick', 'lip tint', 'foundation',
+    'concealer', 'mascara', 'eyeliner', 'serum', 'moisturiser', 'moisturizer', 'sunscreen',
+    'perfume', 'nail', 'haul', 'unboxing', 'ootd', 'outfit', 'snack', 'recipe',
+    'giveaway', 'promo code', 'discount code', 'use my code', 'affiliate', 'shopee', 'lazada',
+    'sponsored', 'collab'
+]
+MATCHER = KeywordMatcher({'housing': HOUSING_TERMS, 'off_topic': OFF_TOPIC_TERMS})
+
+_TOKEN = re.compile(r'#?\w+')
+
+
+def post_features_text(post_text, hashtags=()):
+    tags = ' '.join('#' + str(tag).lstrip('#').lower() for tag in hashtags or ())
+    return f"{post_text} {tags}"
+
+
+def tokens(text):
+    """Lowercased unigrams and bigrams; hashtags keep their '#' prefix"""
+    words = _TOKEN.findall((text or '').lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def feature_ids(text):
+    mask = (1 << FEATURE_BITS) - 1
+    return Counter(zlib.crc32(token.encode('utf-8')) & mask for token in tokens(text))
+
+
+class PrefilterModel:
+    """Logistic regression over L2-normalized hashed TF-IDF vectors"""
+
+    def __init__(self, idf=None, weights=None, bias=0.0, trained_on=None):
+        self.idf = idf or {}
+        self.weights = weights or {}
+        self.bias = bias
+        self.trained_on = trained_on or {}
+
+    def vector(self, text):
+        counts = feature_ids(text)
+        # Like a fitted vocabulary: features never seen in training are ignored
+        vec = {f: (1 + math.log(n)) * self.idf[f] for f, n in counts.items() if f in self.idf}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {f: v / norm for f, v in vec.items()}
+
+    def _probability(self, vec):
+        z = self.bias + sum(self.weights.get(f, 0.0) * v for f, v in vec.items())
+        z = max(-30.0, min(30.0, z))
+        return 1 / (1 + math.exp(-z))
+
+    def probability(self, text):
+        """P(text is a genuine housing review)"""
+        return self._probability(self.vector(text))
+
+    @classmethod
+    def train(cls, texts, labels, epochs=EPOCHS, seed=0):
+        """SGD on the log loss; classes are weighted so both count equally"""
+        docs = len(texts)
+        document_frequency = Counter()
+        for text in texts:
+            document_frequency.update(feature_ids(text).keys())
+        model = cls(
+            idf={f: math.log((1 + docs) / (1 + df)) + 1 for f, df in document_frequency.items()},
+            trained_on={'positive': sum(labels), 'negative': docs - sum(labels)}
+        )
+
+        vectors = [model.vector(text) for text in texts]
+        class_weight = {1: docs / (2 * max(1, sum(labels))), 0: docs / (2 * max(1, docs - sum(labels)))}
+        order = list(range(docs))
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = LEARNING_RATE / (1 + epoch)
+            for i in order:
+                vec, label = vectors[i], labels[i]
+                gradient = (model._probability(vec) - label) * class_weight[label] * rate
+                for f, v in vec.items():
+                    w = model.weights.get(f, 0.0)
+                    model.weights[f] = w - gradient * v - rate * L2 * w
+                model.bias -= gradient
+        return model
+
+    def save(self, path=MODEL_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            'idf': self.idf,
+            'weights': {f: round(w, 6) for f, w in self.weights.items() if abs(w) > 1e-6},
+            'bias': self.bias, 'trained_on': self.trained_on
+        }))
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        path = Path(path)
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        return cls(
+            idf={int(f): v for f, v in data['idf'].items()},
+            weights={int(f): w for f, w in data['weights'].items()},
+            bias=data['bias'],
+            trained_on=data.get('trained_on')
+        )
+
+
+def training_examples(reviews, dirty_data, raw_posts):
+    """(texts, labels) from stored Lemon8 reviews and Claude-rejected raw posts"""
+    texts, labels = [], []
+    for review in reviews.find({'source': 'lemon8'}, {'full_text': 1, 'hashtags': 1}):
+        texts.append(post_features_text(review.get('full_text', ''), review.get('hashtags')))
+        labels.append(1)
+
+    dirty_ids = [
+        doc['raw_post_id']
+        for doc in dirty_data.find({}, {'raw_post_id': 1, 'reason': 1})
+        if not UNLABELED_REASONS.match(doc.get('reason') or '')
+    ]
+    for start in range(0, len(dirty_ids), 1000):
+        projection = {'full_text': 1, 'title': 1, 'content': 1, 'hashtags': 1}
+        for post in raw_posts.find({'_id': {'$in': dirty_ids[start:start + 1000]}}, projection):
+            text = post.get('full_text', '') or f"{post.get('title', '')} {post.get('content', '')}"
+            texts.append(post_features_text(text[:2000], post.get('hashtags')))
+            labels.append(0)
+    return texts, labels
+
+
+def train_from_db(reviews, dirty_data, raw_posts, holdout=0.2, path=MODEL_PATH):
+    """
+    Train, report holdout precision of the reject decision, then refit on
+    everything and save. Returns the model, or None with too few labels.
+    """
+    texts, labels = training_examples(reviews, dirty_data, raw_posts)
+    positives = sum(labels)
+    if min(positives, len(labels) - positives) < MIN_EXAMPLES:
+        print(f"   Pre-filter model not trained: {positives} reviews / "
+              f"{len(labels) - positives} dirty posts (need {MIN_EXAMPLES} of each)")
+        return None
+
+    order = list(range(len(texts)))
+    random.Random(1).shuffle(order)
+    cut = int(len(order) * (1 - holdout))
+    train_idx, test_idx = order[:cut], order[cut:]
+    model = PrefilterModel.train([texts[i] for i in train_idx], [labels[i] for i in train_idx])
+
+    rejected = [labels[i] for i in test_idx if model.probability(texts[i]) < REJECT_BELOW]
+    wrong = sum(rejected)
+    print(f"   Pre-filter holdout: rejects {len(rejected)}/{len(test_idx)} posts, "
+          f"{wrong} of them real reviews ({(1 - wrong / len(rejected)) * 100 if rejected else 100:.1f}% precision)")
+
+    model = PrefilterModel.train(texts, labels)
+    model.save(path)
+    print(f"   Pre-filter model trained on {positives} reviews / {len(labels) - positives} dirty posts")
+    return model
+
+
+class Prefilter:
+    """Rules, then the model; decide() returns a rejection reason or None to escalate"""
+
+    def __init__(self, model=None, reject_below=REJECT_BELOW):
+        self.model = model
+        self.reject_below = reject_below
+        self.counts = Counter()
+
+    def decide(self, post_text, hashtags=()):
+        text = post_features_text(post_text, hashtags)
+        hits = MATCHER.scan(text)
+        if hits['off_topic'] and not hits['housing']:
+            self.counts['rules'] += 1
+            return f"Pre-filter: off-topic ({', '.join(hits['off_topic'][:3])}), no housing content"
+
+        if self.model is not None:
+            probability = self.model.probability(text)
+            if probability < self.reject_below:
+                self.counts['model'] += 1
+                return f"Pre-filter: classifier P(review)={probability:.2f}"
+
+        self.counts['escalated'] += 1
+        return None
+
+    @property
+    def rejected(self):
+        return self.counts['rules'] + self.counts['model']
+
+    def print_stats(self, saved_input_tokens, saved_output_tokens, input_cost_per_mtok, output_cost_per_mtok):
+        total = sum(self.counts.values())
+        if not total:
+            return
+        rate = lambda n: n / total * 100
+        saved = (saved_input_tokens * input_cost_per_mtok + saved_output_tokens * output_cost_per_mtok) / 1e6
+        print(f"   Pre-filter: {total} posts | rules rejected {self.counts['rules']} ({rate(self.counts['rules']):.1f}%) | "
+              f"model rejected {self.counts['model']} ({rate(self.counts['model']):.1f}%) | "
+              f"escalated to Claude {self.counts['escalated']} ({rate(self.counts['escalated']):.1f}%)")
+        print(f"   Pre-filter savings: ~{saved_input_tokens} input / ~{saved_output_tokens} output tokens "
+              f"(~${saved:.2f})")
+
+
+if __name__ == "__main__":
+    from lemonphase2_enhanced import reviews_collection, dirty_data_collection, raw_posts_collection
+
+    train_from_db(reviews_collection, dirty_data_collection, raw_posts_collection)
@@ -5,16 +5,36 @@ PHASE 2: AI ANALYSIS of Lemon8 Raw Posts
 - Use Claude AI to classify reviews vs amenities
 - Extract housing-related content
 - Improve quality scoring and sentiment analysis
+- Posts are leased from lemon8_raw_posts, so several workers (--workers N,
+  or runs on other machines) drain the backlog without double processing
+  and a crashed run's posts are picked up again once their lease expires
+
+Usage: python lemonphase2_enhanced.py [--workers N]
 """
 
+import argparse
+
 import os
 import sys
+import time
+import asyncio
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import MongoClient, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from dotenv import load_dotenv
 import json
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
+from claude_scheduler import ClaudeScheduler
+from claude_cache import AnalysisCache
+from near_duplicates import NearDuplicateIndex
+from lemon8_prefilter import Prefilter, PrefilterModel, train_from_db
+from work_queue import LeaseQueue, LEASE_UNSET
+from json_stream import JsonStreamParser
+from keyword_matcher import KeywordMatcher
 
 # UTF-8 encoding fix for Windows
 if sys.platform == 'win32':
@@ -38,9 +58,60 @@ reviews_collection = db['reviews']
 dirty_data_collection = db['lemon8_dirty_data']
 amenities_collection = db['amenities']
 
-# Claude setup
+# Claude setup (retries are handled by ClaudeScheduler, not the SDK)
 api_key = os.getenv('ANTHROPIC_API_KEY')
-claude_client = Anthropic()
+claude_client = AsyncAnthropic(max_retries=0)
+CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+CLAUDE_MAX_TOKENS = 500
+
+# Stream replies and stop reading once the JSON value closes (LEMON8_STREAMING=0 waits for the full reply)
+STREAMING = os.getenv('LEMON8_STREAMING', '1') == '1'
+# Longer posts are cut to this many (estimated) tokens before being sent
+POST_TOKEN_BUDGET = int(os.getenv('LEMON8_POST_TOKEN_BUDGET', '1200'))
+
+# How replies were parsed: streamed (value closed mid-stream), direct (whole
+# reply is JSON), fallback (fence/substring extraction), failed
+parse_stats = Counter()
+
+# Scheduler limits
+MAX_IN_FLIGHT = int(os.getenv('LEMON8_MAX_IN_FLIGHT', '8'))
+CLAUDE_RPM = int(os.getenv('CLAUDE_REQUESTS_PER_MINUTE', '50'))
+CLAUDE_TPM = int(os.getenv('CLAUDE_TOKENS_PER_MINUTE', '40000'))
+
+# Multi-post batching: up to BATCH_SIZE posts per prompt, bounded by an input token budget
+# (BATCH_SIZE=1 sends one post per request)
+BATCH_SIZE = int(os.getenv('LEMON8_BATCH_SIZE', '1'))
+BATCH_TOKEN_BUDGET = int(os.getenv('LEMON8_BATCH_TOKEN_BUDGET', '6000'))
+BATCH_MAX_OUTPUT_TOKENS = 8192
+
+# Buffered Phase 2 writes are flushed every FLUSH_SIZE posts
+FLUSH_SIZE = int(os.getenv('LEMON8_FLUSH_SIZE', '100'))
+
+# Local worker processes; the RPM/TPM limits above are split between them
+WORKERS = int(os.getenv('LEMON8_WORKERS', '1'))
+DUPLICATE_KEY_ERROR = 11000
+
+# Bump whenever the classification prompt changes so cached results are not reused
+PROMPT_VERSION = 1
+analysis_cache = AnalysisCache(
+    db['claude_analysis_cache'],
+    CLAUDE_MODEL,
+    PROMPT_VERSION,
+    ttl_days=int(os.getenv('LEMON8_CACHE_TTL_DAYS', '90'))
+)
+
+# Cross-posts of an already analyzed post skip Claude and are flagged as dirty data;
+# reviews are kept indefinitely, so their signatures never expire
+near_dups = NearDuplicateIndex('lemon8', max_age_days=0)
+ANALYSIS_FAILED = "Failed to analyze with Claude"
+
+# Local rules + classifier reject obvious non-reviews before Claude (LEMON8_PREFILTER=0 disables);
+# list prices per million tokens, used to estimate what the pre-filter saved
+PREFILTER_ENABLED = os.getenv('LEMON8_PREFILTER', '1') == '1'
+CLAUDE_INPUT_COST_PER_MTOK = float(os.getenv('CLAUDE_INPUT_COST_PER_MTOK', '3'))
+CLAUDE_OUTPUT_COST_PER_MTOK = float(os.getenv('CLAUDE_OUTPUT_COST_PER_MTOK', '15'))
+prefilter = Prefilter()
+prefilter_saved_input_tokens = 0
 
 # Singapore HDB estates (all regions)
 SINGAPORE_ESTATES = [
@@ -98,14 +169,39 @@ PREMIUM_AMENITIES = {
     ]
 }
 
-def analyze_with_claude(post_content, estate):
+MATCHER = KeywordMatcher({'estates': SINGAPORE_ESTATES, **PREMIUM_AMENITIES})
+
+CLASSIFICATION_CRITERIA = """CRITERIA for IS_REVIEW=true:
+- Discusses actual living experience in the HDB estate
+- Mentions housing, amenities, neighbors, environment
+- NOT just a product review (makeup, food, gadgets)
+- NOT just promotional content
+- Contains genuine opinions/experiences
+
+CRITERIA for IS_REVIEW=false:
+- Pure product/food review (makeup, skincare, snacks)
+- Tourist guide (just listing places)
+- Unrelated content (school reviews, product unboxing)
+- Spam or promotional garbage
+- No connection to housing/living experience
+
+Sentiment should reflect OVERALL tone about living in that area."""
+
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+
+def truncate_to_token_budget(text, budget=POST_TOKEN_BUDGET):
     """
-    Use Claude to analyze if this is a genuine HDB review or dirty data
+    Cut text to about `budget` tokens (same ~4 chars/token estimate as the
+    scheduler), at a word boundary
     """
-    prompt = f"""Analyze this Lemon8 post about {estate} and determine if it's a GENUINE HDB/housing review.
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(' ', 0, limit)
+    return text[:cut if cut > limit // 2 else limit] + " ..."
 
-POST CONTENT:
-"{post_content}"
+# Fixed instructions go in the system prompt; only the post text varies per request
+SYSTEM_PROMPT = f"""You analyze a Lemon8 post about a Singapore HDB estate and determine if it's a GENUINE HDB/housing review.
 
 TASK: Respond ONLY with a JSON object (no markdown, no code blocks):
 {{
@@ -117,52 +213,158 @@ TASK: Respond ONLY with a JSON object (no markdown, no code blocks):
     "cons": ["list", "of", "negative", "aspects"]
 }}
 
-CRITERIA for IS_REVIEW=true:
-- Discusses actual living experience in the HDB estate
-- Mentions housing, amenities, neighbors, environment
-- NOT just a product review (makeup, food, gadgets)
-- NOT just promotional content
-- Contains genuine opinions/experiences
+{CLASSIFICATION_CRITERIA}"""
 
-CRITERIA for IS_REVIEW=false:
-- Pure product/food review (makeup, skincare, snacks)
-- Tourist guide (just listing places)
-- Unrelated content (school reviews, product unboxing)
-- Spam or promotional garbage
-- No connection to housing/living experience
+def build_prompt(post_content, estate):
+    """
+    Build the user message for a single post (instructions are in SYSTEM_PROMPT)
+    """
+    post_content = truncate_to_token_budget(post_content)
+    return f'''Lemon8 post about {estate}:
 
-Sentiment should reflect OVERALL tone about living in that area."""
+POST CONTENT:
+"{post_content}"'''
 
+def parse_claude_json(text):
+    """
+    Parse a JSON object out of Claude's reply, tolerating markdown fences
+    """
     try:
-        response = claude_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=500,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
-        
-        text = response.content[0].text.strip()
-        
-        # Try to parse JSON
-        try:
-            data = json.loads(text)
+        data = json.loads(text)
+        parse_stats['direct'] += 1
+        return data
+    except json.JSONDecodeError:
+        pass
+    
+    try:
+        # If Claude returns markdown, extract JSON
+        if '```json' in text:
+            json_str = text.split('```json')[1].split('```')[0].strip()
+        elif '{' in text:
+            json_str = text[text.find('{'):text.rfind('}')+1]
+        else:
+            parse_stats['failed'] += 1
+            return None
+        data = json.loads(json_str)
+        parse_stats['fallback'] += 1
+        return data
+    except json.JSONDecodeError:
+        parse_stats['failed'] += 1
+        return None
+
+BATCH_SYSTEM_PROMPT = f"""You analyze Lemon8 posts and determine, for each one, if it's a GENUINE HDB/housing review of the estate it is about.
+
+TASK: Respond ONLY with a JSON array (no markdown, no code blocks) with exactly one object per post:
+[
+    {{
+        "id": "post id from the [POST ...] header",
+        "is_review": true/false,
+        "reason": "Brief reason why it is/isn't a review",
+        "sentiment": "positive/neutral/negative",
+        "key_points": ["list", "of", "key", "observations"],
+        "pros": ["list", "of", "positive", "aspects"],
+        "cons": ["list", "of", "negative", "aspects"]
+    }}
+]
+
+{CLASSIFICATION_CRITERIA}"""
+
+def build_batch_prompt(entries):
+    """
+    Build the user message for several posts (instructions are in BATCH_SYSTEM_PROMPT).
+    `entries` is a list of (post_id, estate, post_content); post ids are batch-local.
+    """
+    posts_block = "\n\n".join(
+        f'[POST {post_id}] (about {estate})\n"{truncate_to_token_budget(post_content)}"'
+        for post_id, estate, post_content in entries
+    )
+    
+    return f"""POSTS:
+{posts_block}"""
+
+def parse_claude_json_array(text):
+    """
+    Parse a JSON array out of Claude's reply, tolerating markdown fences
+    """
+    try:
+        data = json.loads(text)
+        parse_stats['direct'] += 1
+        return data
+    except json.JSONDecodeError:
+        pass
+    
+    try:
+        if '```json' in text:
+            json_str = text.split('```json')[1].split('```')[0].strip()
+        elif '[' in text:
+            json_str = text[text.find('['):text.rfind(']')+1]
+        else:
+            parse_stats['failed'] += 1
+            return None
+        data = json.loads(json_str)
+        parse_stats['fallback'] += 1
+        return data
+    except json.JSONDecodeError:
+        parse_stats['failed'] += 1
+        return None
+
+async def request_json(system, prompt, max_tokens, scheduler, opener, parse):
+    """
+    Send the fixed system instructions plus a post prompt and parse the JSON
+    value ('{' object or '[' array) in the reply.
+    When streaming, reading stops as soon as the value closes; a reply that
+    never yields a complete value goes through `parse` like a non-streamed one.
+    """
+    kwargs = {
+        'model': CLAUDE_MODEL,
+        'max_tokens': max_tokens,
+        'system': system,
+        'messages': [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    }
+    estimate = ClaudeScheduler.estimate_tokens(system + prompt, max_tokens)
+    
+    if STREAMING:
+        parser = JsonStreamParser(opener)
+        text = await scheduler.stream(estimate, stop=parser.feed, **kwargs)
+        data = parser.result()
+        if data is not None:
+            parse_stats['streamed'] += 1
             return data
-        except json.JSONDecodeError:
-            # If Claude returns markdown, extract JSON
-            if '```json' in text:
-                json_str = text.split('```json')[1].split('```')[0].strip()
-                data = json.loads(json_str)
-                return data
-            elif '{' in text:
-                json_str = text[text.find('{'):text.rfind('}')+1]
-                data = json.loads(json_str)
-                return data
-            else:
-                return None
+    else:
+        response = await scheduler.create(estimate, **kwargs)
+        text = response.content[0].text
+    
+    return parse(text.strip())
+
+def is_valid_analysis(data):
+    """
+    Check one analysis object against the is_review/sentiment/key_points/pros/cons schema
+    """
+    if not isinstance(data, dict):
+        return False
+    if not isinstance(data.get('is_review'), bool):
+        return False
+    if data.get('sentiment', 'neutral') not in SENTIMENT_LABELS:
+        return False
+    for field in ('key_points', 'pros', 'cons'):
+        value = data.get(field, [])
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            return False
+    return True
+
+async def analyze_with_claude(post_content, estate, scheduler):
+    """
+    Use Claude to analyze if this is a genuine HDB review or dirty data
+    """
+    prompt = build_prompt(post_content, estate)
+
+    try:
+        return await request_json(SYSTEM_PROMPT, prompt, CLAUDE_MAX_TOKENS, scheduler, '{', parse_claude_json)
     except Exception as e:
         print(f"        Error calling Claude: {str(e)[:100]}")
         return None
@@ -171,47 +373,160 @@ def extract_estates_from_text(text):
     """
     Extract mentioned estates from text (case-insensitive)
     """
-    mentioned = []
-    text_lower = text.lower()
-    
-    for estate in SINGAPORE_ESTATES:
-        if estate.lower() in text_lower:
-            mentioned.append(estate)
-    
-    return list(set(mentioned))  # Remove duplicates
+    return list(MATCHER.scan(text)['estates'])
 
 def extract_amenities(text):
     """
     Extract amenities mentioned in the text
     """
-    amenities = {category: [] for category in PREMIUM_AMENITIES.keys()}
-    text_lower = text.lower()
-    
-    for category, items in PREMIUM_AMENITIES.items():
-        for item in items:
-            if item.lower() in text_lower:
-                # For shopping, avoid matching just "ion" in other words
-                if category == 'shopping' and item.lower() == 'ion orchard':
-                    if 'ion orchard' in text_lower or 'ion' in text_lower.split():
-                        amenities[category].append(item)
-                else:
-                    amenities[category].append(item)
+    hits = MATCHER.scan(text)
     
     # Remove empty categories
-    amenities = {k: v for k, v in amenities.items() if v}
-    return amenities
+    return {category: list(hits[category]) for category in PREMIUM_AMENITIES if hits[category]}
 
-def process_raw_post(post, estate):
+async def analyze_batch_with_claude(entries, scheduler):
     """
-    Process a single raw post: analyze with Claude, extract amenities, determine quality
+    Classify several posts with a single Claude call.
+    Returns {post_id: analysis} for the posts whose result passed validation,
+    or None if the response could not be parsed at all.
     """
-    post_text = post.get('full_text', '') or f"{post.get('title', '')} {post.get('content', '')}"
+    prompt = build_batch_prompt(entries)
+    max_tokens = min(BATCH_MAX_OUTPUT_TOKENS, CLAUDE_MAX_TOKENS * len(entries))
+    
+    try:
+        data = await request_json(BATCH_SYSTEM_PROMPT, prompt, max_tokens, scheduler, '[', parse_claude_json_array)
+    except Exception as e:
+        print(f"        Error calling Claude (batch): {str(e)[:100]}")
+        return None
     
-    # Get Claude analysis
-    analysis = analyze_with_claude(post_text, estate)
+    if not isinstance(data, list):
+        return None
+    
+    return {
+        str(item['id']): item
+        for item in data
+        if isinstance(item, dict) and 'id' in item and is_valid_analysis(item)
+    }
+
+def get_post_text(post):
+    return post.get('full_text', '') or f"{post.get('title', '')} {post.get('content', '')}"
+
+def post_key(post):
+    return post.get('post_url') or str(post['_id'])
+
+def near_duplicate_reason(post, post_text):
+    """
+    Dirty-data reason if the post nearly duplicates one already analyzed, else None.
+    Fingerprints the same 2000 characters a review stores as full_text. The
+    post is held so cross-posts claimed alongside it are caught too;
+    ResultWriter indexes it once its analysis is stored, or drops it.
+    """
+    match = near_dups.check(post_key(post), post_text[:2000], hold=True)
+    if match:
+        return f"Near-duplicate of {match[0]} (similarity {match[1]:.2f})"
+    return None
+
+def prefilter_reason(post, post_text, estate):
+    """Dirty-data reason if the local pre-filter rejects the post, else None (ask Claude)"""
+    global prefilter_saved_input_tokens
+    if not PREFILTER_ENABLED:
+        return None
+    reason = prefilter.decide(post_text, post.get('hashtags'))
+    if reason:
+        prefilter_saved_input_tokens += ClaudeScheduler.estimate_tokens(SYSTEM_PROMPT + build_prompt(post_text, estate))
+    return reason
+
+def load_prefilter(train=True):
+    """Use the saved pre-filter model, training one from stored labels if there is none yet"""
+    if not PREFILTER_ENABLED:
+        return
+    model = PrefilterModel.load()
+    if model is None and train:
+        model = train_from_db(reviews_collection, dirty_data_collection, raw_posts_collection)
+    prefilter.model = model
+    if train:
+        print(f"   Pre-filter: rules{' + classifier' if model else ' only'}")
+
+def seed_near_duplicates():
+    """Index stored Lemon8 reviews the first time the local index is used"""
+    if len(near_dups):
+        return
+    reviews = reviews_collection.find({'source': 'lemon8', 'post_url': {'$ne': ''}}, {'post_url': 1, 'full_text': 1})
+    near_dups.add_many((review['post_url'], review.get('full_text', '')) for review in reviews)
+    print(f"   Near-duplicate index seeded with {len(near_dups)} stored reviews")
+
+async def analyze_uncached(post_text, estate, scheduler):
+    """
+    Call Claude for one post and store a successful analysis in the cache
+    """
+    analysis = await analyze_with_claude(post_text, estate, scheduler)
+    await asyncio.to_thread(analysis_cache.put, post_text, estate, analysis)
+    return analysis
+
+async def process_batch(batch, scheduler, stats):
+    """
+    Process a batch of (post, estate) pairs, returning [(review, error)] in batch order.
+    Near-duplicates of earlier posts are flagged without a call, cached posts
+    are answered from the cache and obvious non-reviews rejected by the local
+    pre-filter; the rest share one Claude call.
+    Posts missing or invalid in the batch response, or the whole batch if the
+    response is malformed, fall back to per-post calls.
+    """
+    texts = [get_post_text(post) for post, _ in batch]
+    duplicates = [near_duplicate_reason(post, text) for (post, _), text in zip(batch, texts)]
+    # One cache query for the batch, off the event loop
+    lookups = [n for n, duplicate in enumerate(duplicates) if not duplicate]
+    found = await asyncio.to_thread(analysis_cache.get_many, [(texts[n], batch[n][1]) for n in lookups])
+    cached = [None] * len(batch)
+    for n, analysis in zip(lookups, found):
+        cached[n] = analysis
+    rejected = [
+        prefilter_reason(post, text, estate) if hit is None and not duplicate else None
+        for (post, estate), text, hit, duplicate in zip(batch, texts, cached, duplicates)
+    ]
+    # Dirty-data reason for posts answered without Claude
+    skipped = [duplicate or reason for duplicate, reason in zip(duplicates, rejected)]
+    entries = [
+        (str(n), estate, text)
+        for n, ((_, estate), text, hit, skip) in enumerate(zip(batch, texts, cached, skipped), 1)
+        if hit is None and not skip
+    ]
     
+    analyses = {}
+    batched = len(entries) > 1
+    if batched:
+        analyses = await analyze_batch_with_claude(entries, scheduler)
+        stats['batches'] += 1
+        if analyses is None:
+            stats['batch_fallbacks'] += 1
+            analyses = {}
+        await asyncio.to_thread(analysis_cache.put_many, [
+            (text, estate, analyses.get(post_id)) for post_id, estate, text in entries
+        ])
+    
+    async def resolve(n, post, estate, text, hit, skip):
+        post_id = str(n)
+        if skip:
+            return None, skip
+        if hit is not None:
+            return build_review(post, estate, text, hit)
+        if post_id in analyses:
+            return build_review(post, estate, text, analyses[post_id])
+        if batched:
+            stats['post_fallbacks'] += 1
+        return build_review(post, estate, text, await analyze_uncached(text, estate, scheduler))
+    
+    return await asyncio.gather(*[
+        resolve(n, post, estate, text, hit, skip)
+        for n, ((post, estate), text, hit, skip) in enumerate(zip(batch, texts, cached, skipped), 1)
+    ])
+
+def build_review(post, estate, post_text, analysis):
+    """
+    Turn a Claude analysis into a review document, or an error reason for dirty data
+    """
     if not analysis:
-        return None, "Failed to analyze with Claude"
+        return None, ANALYSIS_FAILED
     
     is_review = analysis.get('is_review', False)
     
@@ -255,7 +570,264 @@ def process_raw_post(post, estate):
     
     return review, None
 
+def ensure_indexes():
+    """
+    Duplicate Lemon8 reviews are rejected by a unique index instead of a read-before-write
+    """
+    reviews_collection.create_index(
+        [('source', 1), ('post_url', 1)],
+        unique=True,
+        partialFilterExpression={'source': 'lemon8'},
+        name='lemon8_source_post_url_unique'
+    )
+    dirty_data_collection.create_index('raw_post_id')
+
+class ResultWriter:
+    """
+    Buffers Phase 2 writes and flushes them as bulk_write batches.
+    Each flush writes reviews and dirty data first and only then marks the raw
+    posts processed, so a crash can re-process a post but never lose one.
+    """
+    
+    def __init__(self, flush_size=FLUSH_SIZE, queue=None):
+        self.flush_size = flush_size
+        self.queue = queue
+        self.pending = []
+        self.counts = {'reviews_created': 0, 'dirty_count': 0, 'write_failures': 0}
+    
+    def add(self, post, estate, review, error):
+        self.pending.append((post, estate, review, error))
+    
+    @property
+    def full(self):
+        return len(self.pending) >= self.flush_size
+    
+    def flush(self):
+        if not self.pending:
+            return
+        
+        pending, self.pending = self.pending, []
+        review_rows = [row for row in pending if not row[3]]
+        dirty_rows = [row for row in pending if row[3]]
+        failed_ids = set()
+        
+        if review_rows:
+            ops = [InsertOne(review) for _, _, review, _ in review_rows]
+            try:
+                created = reviews_collection.bulk_write(ops, ordered=False).inserted_count
+            except BulkWriteError as e:
+                created = e.details.get('nInserted', 0)
+                for write_error in e.details.get('writeErrors', []):
+                    # Duplicates are expected; anything else must be retried next run
+                    if write_error.get('code') != DUPLICATE_KEY_ERROR:
+                        failed_ids.add(review_rows[write_error['index']][0]['_id'])
+            
+            self.counts['reviews_created'] += created
+            self.counts['dirty_count'] += len(review_rows) - created - len(failed_ids)  # Duplicates
+        
+        if dirty_rows:
+            ops = [
+                UpdateOne(
+                    {'raw_post_id': post['_id']},
+                    {'$set': {
+                        'raw_post_id': post['_id'],
+                        'estate': estate,
+                        'reason': error,
+                        'title': post.get('title', ''),
+                        'flagged_at': datetime.now()
+                    }},
+                    upsert=True
+                )
+                for post, estate, _, error in dirty_rows
+            ]
+            dirty_failures = set()
+            try:
+                dirty_data_collection.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                for write_error in e.details.get('writeErrors', []):
+                    dirty_failures.add(dirty_rows[write_error['index']][0]['_id'])
+            
+            self.counts['dirty_count'] += len(dirty_rows) - len(dirty_failures)
+            failed_ids |= dirty_failures
+        
+        # Acknowledge only posts whose outcome is safely stored
+        acks = [
+            UpdateOne(
+                {'_id': post['_id']},
+                {'$set': {
+                    'processed': True,
+                    'analyzed_at': datetime.now(),
+                    'error': error if error else None
+                }, '$unset': LEASE_UNSET}
+            )
+            for post, _, _, error in pending
+            if post['_id'] not in failed_ids
+        ]
+        if acks:
+            raw_posts_collection.bulk_write(acks, ordered=False)
+        if self.queue is not None:
+            # Failed posts are no longer renewed either; their lease runs out and they are retried
+            self.queue.settle(post['_id'] for post, _, _, _ in pending)
+        
+        # Only stored, successfully analyzed posts may hide their cross-posts
+        near_dups.add(
+            post_key(post) for post, _, _, error in pending
+            if post['_id'] not in failed_ids and error != ANALYSIS_FAILED
+        )
+        near_dups.discard(post_key(post) for post, _, _, _ in pending)
+        
+        self.counts['write_failures'] += len(failed_ids)
+
+async def process_posts(queue, unprocessed, requests_per_minute=CLAUDE_RPM, tokens_per_minute=CLAUDE_TPM):
+    """
+    Classify posts with up to MAX_IN_FLIGHT Claude requests in flight.
+    Posts are grouped into batches of up to BATCH_SIZE within BATCH_TOKEN_BUDGET.
+    Results are recorded strictly in claim order and flushed in bulk batches;
+    acknowledging a post clears its lease, so after a crash the posts whose
+    batch was never acknowledged are claimable again once their lease expires.
+    Leases of posts still waiting for their flush are renewed on a heartbeat.
+    """
+    scheduler = ClaudeScheduler(
+        claude_client,
+        max_in_flight=MAX_IN_FLIGHT,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute
+    )
+    
+    print(f"   Scheduler: {MAX_IN_FLIGHT} in flight | {requests_per_minute} req/min | {tokens_per_minute} tokens/min")
+    print(f"   Batching: up to {BATCH_SIZE} posts / {BATCH_TOKEN_BUDGET} tokens per prompt\n")
+    
+    writer = ResultWriter(queue=queue)
+    stats = {'batches': 0, 'batch_fallbacks': 0, 'post_fallbacks': 0}
+    window = deque()
+    batch = []
+    batch_tokens = 0
+    started = time.monotonic()
+    i = 0
+    
+    async def record_next():
+        nonlocal i
+        batch_posts, task = window.popleft()
+        results = await task
+        
+        for (post, estate), (review, error) in zip(batch_posts, results):
+            writer.add(post, estate, review, error)
+            
+            i += 1
+            if i % 50 == 0 or i == 1:
+                elapsed_min = max(time.monotonic() - started, 1e-6) / 60
+                print(f"   [{i}/{unprocessed}] Processed {estate}... ({i / elapsed_min:.1f} posts/min)")
+        
+        # Bulk writes run on a thread so in-flight Claude calls keep streaming
+        if writer.full:
+            await asyncio.to_thread(writer.flush)
+    
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(queue.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(queue.renew)
+            except PyMongoError as e:
+                print(f"   ⚠️  Lease renewal failed: {e}")
+    
+    async def submit(batch_posts):
+        window.append((batch_posts, asyncio.create_task(process_batch(batch_posts, scheduler, stats))))
+        
+        # Keep a little more than MAX_IN_FLIGHT queued to hide head-of-line waits
+        if len(window) >= MAX_IN_FLIGHT * 2:
+            await record_next()
+    
+    renewer = asyncio.create_task(heartbeat())
+    try:
+        while True:
+            # Claiming is a few round trips; keep them off the event loop
+            claimed = await asyncio.to_thread(queue.claim)
+            if not claimed:
+                break
+            
+            for post in claimed:
+                estate = post.get('estate', 'Unknown')
+                post_tokens = min(ClaudeScheduler.estimate_tokens(get_post_text(post)), POST_TOKEN_BUDGET)
+                
+                if batch and (len(batch) >= BATCH_SIZE or batch_tokens + post_tokens > BATCH_TOKEN_BUDGET):
+                    await submit(batch)
+                    batch, batch_tokens = [], 0
+                
+                batch.append((post, estate))
+                batch_tokens += post_tokens
+        
+        if batch:
+            await submit(batch)
+        
+        while window:
+            await record_next()
+        
+        await asyncio.to_thread(writer.flush)
+    finally:
+        renewer.cancel()
+        for _, task in window:
+            task.cancel()
+    
+    if scheduler.retries:
+        print(f"   Rate-limit retries: {scheduler.retries}")
+    if stats['batches']:
+        print(f"   Batches: {stats['batches']} | "
+              f"Malformed (per-post fallback): {stats['batch_fallbacks']} | "
+              f"Posts re-sent individually: {stats['post_fallbacks']}")
+    print(f"   Claude tokens: {scheduler.input_tokens} in / {scheduler.output_tokens} out "
+          f"over {scheduler.requests} requests in {(time.monotonic() - started) / 60:.1f} min")
+    parsed = sum(parse_stats.values())
+    if parsed:
+        fallback_rate = (parse_stats['fallback'] + parse_stats['failed']) / parsed * 100
+        print(f"   Reply parsing: {parse_stats['streamed']} closed mid-stream "
+              f"({scheduler.early_stops} streams cut early) | {parse_stats['direct']} direct | "
+              f"{parse_stats['fallback']} fallback | {parse_stats['failed']} failed "
+              f"({fallback_rate:.1f}% fallback rate)")
+    if PREFILTER_ENABLED:
+        # Rejected posts would have produced about as much output as the calls that were made
+        avg_output = scheduler.output_tokens / scheduler.requests if scheduler.requests else CLAUDE_MAX_TOKENS / 2
+        prefilter.print_stats(prefilter_saved_input_tokens, int(prefilter.rejected * avg_output),
+                              CLAUDE_INPUT_COST_PER_MTOK, CLAUDE_OUTPUT_COST_PER_MTOK)
+    if writer.counts['write_failures']:
+        print(f"   Write failures (left unprocessed for the next run): {writer.counts['write_failures']}")
+    
+    return writer.counts
+
+def run_worker(unprocessed, workers=1):
+    """
+    Drain the leased work queue in this process; returns counts for the summary.
+    Runs in a spawned process when --workers > 1.
+    """
+    if workers > 1:
+        load_prefilter(train=False)
+    
+    queue = LeaseQueue(raw_posts_collection, {'processed': False})
+    print(f"   Worker {queue.worker_id}: claiming {queue.claim_batch} posts at a time")
+    try:
+        counts = asyncio.run(process_posts(
+            queue, unprocessed,
+            requests_per_minute=max(1, CLAUDE_RPM // workers),
+            tokens_per_minute=max(1, CLAUDE_TPM // workers)
+        ))
+    finally:
+        # Anything claimed but not acknowledged is free for other workers again
+        queue.release()
+        near_dups.close()
+    
+    return dict(
+        counts,
+        cache_hits=analysis_cache.hits,
+        cache_misses=analysis_cache.misses,
+        near_duplicates=near_dups.duplicates,
+        near_duplicates_checked=near_dups.checked
+    )
+
 def main():
+    parser = argparse.ArgumentParser(description='Lemon8 Phase 2: AI review analysis')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help='Worker processes draining the queue (Claude rate limits are split between them)')
+    args = parser.parse_args()
+    
     print("\n" + "="*70)
     print("[LEMON8 PHASE 2 - ENHANCED] AI-Powered Review Analysis")
     print("="*70)
@@ -263,8 +835,9 @@ def main():
     print("   ✓ Claude AI for accurate review classification")
     print("   ✓ Improved sentiment detection")
     print("   ✓ Premium amenity extraction")
-    print("   ✓ Better quality filtering")
-    print("   ✓ Duplicate prevention")
+    print("   ✓ Better quality filtering (local pre-filter before Claude)")
+    print("   ✓ Duplicate prevention (exact and near-duplicate)")
+    print("   ✓ Leased work queue (parallel workers, crash-safe)")
     print("="*70 + "\n")
     
     # Check raw posts
@@ -282,65 +855,37 @@ def main():
     
     print(f"[Processing] {unprocessed} posts...\n")
     
-    # Get unprocessed posts
-    posts = raw_posts_collection.find({'processed': False})
-    
-    reviews_created = 0
-    dirty_count = 0
-    error_count = 0
-    
-    for i, post in enumerate(posts, 1):
-        estate = post.get('estate', 'Unknown')
-        
-        if i % 50 == 0 or i == 1:
-            print(f"   [{i}/{unprocessed}] Processing {estate}...")
-        
-        # Analyze post
-        review, error = process_raw_post(post, estate)
-        
-        if error:
-            # Save to dirty data
-            dirty_data_collection.insert_one({
-                'raw_post_id': post['_id'],
-                'estate': estate,
-                'reason': error,
-                'title': post.get('title', ''),
-                'flagged_at': datetime.now()
-            })
-            dirty_count += 1
-        else:
-            # Check for duplicate
-            existing = reviews_collection.find_one({
-                'source': 'lemon8',
-                'post_url': review['post_url']
-            })
-            
-            if not existing:
-                reviews_collection.insert_one(review)
-                reviews_created += 1
-            else:
-                dirty_count += 1  # Count as duplicate
-        
-        # Mark as processed
-        raw_posts_collection.update_one(
-            {'_id': post['_id']},
-            {
-                '$set': {
-                    'processed': True,
-                    'analyzed_at': datetime.now(),
-                    'error': error if error else None
-                }
-            }
-        )
+    ensure_indexes()
+    analysis_cache.ensure_indexes()
+    LeaseQueue(raw_posts_collection, {'processed': False}).ensure_indexes()
+    seed_near_duplicates()
+    load_prefilter()
+    
+    if args.workers > 1:
+        # spawn: each worker opens its own MongoDB and Claude clients
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(run_worker, [unprocessed] * args.workers, [args.workers] * args.workers))
+        near_dups.close()
+    else:
+        results = [run_worker(unprocessed)]
+    
+    counts = {key: sum(result[key] for result in results) for key in results[0]}
+    reviews_created = counts['reviews_created']
+    dirty_count = counts['dirty_count']
+    processed = reviews_created + dirty_count
+    lookups = counts['cache_hits'] + counts['cache_misses']
     
     # Summary
     print(f"\n" + "="*70)
     print(f"[RESULTS]")
     print(f"="*70)
-    print(f"   Processed: {unprocessed}")
+    print(f"   Processed: {processed} ({args.workers} worker{'s' if args.workers > 1 else ''})")
     print(f"   Reviews Created: {reviews_created}")
     print(f"   Flagged as Dirty: {dirty_count}")
-    print(f"   Quality Rate: {(reviews_created/unprocessed)*100:.1f}%")
+    print(f"   Quality Rate: {(reviews_created / max(processed, 1))*100:.1f}%")
+    print(f"   Cache Hits: {counts['cache_hits']} | Misses: {counts['cache_misses']} "
+          f"({(counts['cache_hits'] / lookups * 100) if lookups else 0.0:.1f}% hit rate)")
+    print(f"   Near-duplicates (Claude skipped): {counts['near_duplicates']} of {counts['near_duplicates_checked']}")
     
     # Stats
     total_reviews = reviews_collection.count_documents({'source': 'lemon8'})
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Bulk upsert helper shared by the news scrapers
+- One UpdateOne(upsert=True) per document, sent with bulk_write(ordered=False)
+- Fields listed in update_fields go in $set (refreshed on every run),
+  everything else in $setOnInsert (written only when the document is new)
+- One round trip per chunk instead of find_one + insert/update per document
+"""
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+def build_upsert(doc, key, update_fields=None):
+    """
+    Build the UpdateOne for one document.
+    update_fields=None puts the whole document in $set (overwrite on every run).
+    """
+    if update_fields is None:
+        set_fields = dict(doc)
+        insert_fields = {}
+    else:
+        set_fields = {f: doc[f] for f in update_fields if f in doc}
+        insert_fields = {f: v for f, v in doc.items() if f not in set_fields and f != key}
+
+    update = {}
+    if set_fields:
+        update['$set'] = set_fields
+    if insert_fields:
+        update['$setOnInsert'] = insert_fields
+
+    return UpdateOne({key: doc[key]}, update, upsert=True)
+
+
+def bulk_upsert(collection, docs, key, update_fields=None, chunk_size=500):
+    """
+    Upsert docs keyed on `key` in unordered chunks.
+    Returns {'inserted': n, 'updated': n, 'failed': n}.
+    """
+    counts = {'inserted': 0, 'updated': 0, 'failed': 0}
+
+    # Collapse duplicates within the run (last one wins) so two upserts
+    # for the same key never race inside an unordered batch
+    unique = list({doc[key]: doc for doc in docs}.values())
+
+    for start in range(0, len(unique), chunk_size):
+        ops = [build_upsert(doc, key, update_fields) for doc in unique[start:start + chunk_size]]
+
+        try:
+            result = collection.bulk_write(ops, ordered=False)
+            counts['inserted'] += result.upserted_count
+            counts['updated'] += result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            counts['inserted'] += details.get('nUpserted', 0)
+            counts['updated'] += details.get('nMatched', 0)
+            counts['failed'] += len(details.get('writeErrors', []))
+            for error in details.get('writeErrors', [])[:3]:
+                print(f"   ⚠️  Error: {error.get('errmsg', '')[:100]}")
+        except Exception as e:
+            counts['failed'] += len(ops)
+            print(f"   ⚠️  Error: {str(e)}")
+
+    return counts
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate index for syndicated news stories and Lemon8 cross-posts
+- MinHash signature over word 3-gram shingles of the normalized text
+- LSH: the signature is cut into bands; texts sharing any band bucket are
+  candidates, confirmed by the estimated Jaccard similarity
+- Signatures and buckets live in a local SQLite file next to the article
+  cache, one namespace per content type ('news', 'lemon8')
+- check() never writes: a document is indexed with add() only once its
+  result is stored, so a failed save or analysis does not hide later copies
+"""
+
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+
+from scraper_resources import CACHE_DIR
+
+THRESHOLD = float(os.getenv('NEAR_DUP_THRESHOLD', '0.8'))
+MAX_AGE_DAYS = int(os.getenv('NEAR_DUP_MAX_AGE_DAYS', '30'))
+
+# 16 bands x 4 rows: pairs at 0.8 similarity almost always share a bucket,
+# pairs below 0.3 rarely do
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(2003)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text):
+    """Hashed word n-grams of the lowercased text"""
+    words = _WORD.findall((text or '').lower())
+    if len(words) < SHINGLE_SIZE:
+        words = words + [''] * (SHINGLE_SIZE - len(words))
+    grams = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'little') for g in grams]
+
+
+def minhash(text):
+    hashes = shingles(text)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def band_buckets(signature):
+    for band in range(BANDS):
+        rows = struct.pack(f'<{ROWS}Q', *signature[band * ROWS:(band + 1) * ROWS])
+        yield band, int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'little', signed=True)
+
+
+class NearDuplicateIndex:
+    def __init__(self, namespace, path=CACHE_DIR / 'near_duplicates.sqlite', threshold=THRESHOLD,
+                 max_age_days=MAX_AGE_DAYS):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Several Lemon8 workers may share the file, so wait for each other's writes
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS signatures ('
+            ' namespace TEXT, doc_id TEXT, signature BLOB, created_at REAL,'
+            ' PRIMARY KEY (namespace, doc_id))'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS buckets (namespace TEXT, band INTEGER, bucket INTEGER, doc_id TEXT)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (namespace, band, bucket)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS buckets_doc ON buckets (namespace, doc_id)')
+        self.namespace = namespace
+        self.threshold = threshold
+        self.max_age = max_age_days * 24 * 3600 if max_age_days else None
+        self.lock = threading.Lock()
+        # doc_id -> signature of checked documents not yet added or discarded
+        self.pending = {}
+        # Held documents are matched by later checks before they are added
+        self.held_buckets = {}
+        self.checked = 0
+        self.duplicates = 0
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM signatures WHERE namespace = ?',
+                                     (self.namespace,)).fetchone()[0]
+
+    def _signature(self, doc_id):
+        if doc_id in self.pending:
+            return self.pending[doc_id]
+        row = self.conn.execute('SELECT signature FROM signatures WHERE namespace = ? AND doc_id = ?',
+                                (self.namespace, doc_id)).fetchone()
+        return struct.unpack(f'<{NUM_PERM}Q', row[0]) if row else None
+
+    def _match(self, doc_id, signature):
+        candidates = set()
+        for band, bucket in band_buckets(signature):
+            rows = self.conn.execute(
+                'SELECT doc_id FROM buckets WHERE namespace = ? AND band = ? AND bucket = ?',
+                (self.namespace, band, bucket)
+            )
+            candidates.update(row[0] for row in rows)
+            candidates.update(self.held_buckets.get((band, bucket), ()))
+        candidates.discard(doc_id)
+
+        best = None
+        for candidate in candidates:
+            other = self._signature(candidate)
+            if other is None:
+                continue
+            score = similarity(signature, other)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best
+
+    def _add(self, doc_id, signature):
+        self.conn.execute('DELETE FROM buckets WHERE namespace = ? AND doc_id = ?', (self.namespace, doc_id))
+        self.conn.execute(
+            'INSERT OR REPLACE INTO signatures (namespace, doc_id, signature, created_at) VALUES (?, ?, ?, ?)',
+            (self.namespace, doc_id, struct.pack(f'<{NUM_PERM}Q', *signature), time.time())
+        )
+        self.conn.executemany(
+            'INSERT INTO buckets (namespace, band, bucket, doc_id) VALUES (?, ?, ?, ?)',
+            [(self.namespace, band, bucket, doc_id) for band, bucket in band_buckets(signature)]
+        )
+
+    def _unhold(self, doc_id, signature):
+        for band_bucket in band_buckets(signature):
+            held = self.held_buckets.get(band_bucket)
+            if held is not None:
+                held.discard(doc_id)
+                if not held:
+                    del self.held_buckets[band_bucket]
+
+    def check(self, doc_id, text, hold=False):
+        """
+        Return (original_doc_id, similarity) if text nearly duplicates another
+        document, else None. A document is never a duplicate of itself, so
+        re-scraping the same item is fine. Nothing is indexed yet: an unmatched
+        document waits for add() or discard(), and with hold=True later checks
+        in this process already match it in the meantime.
+        """
+        signature = minhash(text)
+        with self.lock:
+            self.checked += 1
+            match = self._match(doc_id, signature)
+            if match:
+                self.duplicates += 1
+                return match
+
+            if doc_id in self.pending:
+                self._unhold(doc_id, self.pending[doc_id])
+            self.pending[doc_id] = signature
+            if hold:
+                for band_bucket in band_buckets(signature):
+                    self.held_buckets.setdefault(band_bucket, set()).add(doc_id)
+        return None
+
+    def add(self, doc_ids):
+        """Index checked documents whose result is now stored"""
+        with self.lock:
+            for doc_id in doc_ids:
+                signature = self.pending.pop(doc_id, None)
+                if signature is not None:
+                    self._unhold(doc_id, signature)
+                    self._add(doc_id, signature)
+            # Committed at once so concurrent workers see them
+            self.conn.commit()
+
+    def discard(self, doc_ids):
+        """Forget checked documents that were not stored, so their copies are not hidden"""
+        with self.lock:
+            for doc_id in doc_ids:
+                signature = self.pending.pop(doc_id, None)
+                if signature is not None:
+                    self._unhold(doc_id, signature)
+
+    def add_many(self, docs):
+        """Index (doc_id, text) pairs without checking them, e.g. to seed from stored documents"""
+        with self.lock:
+            for doc_id, text in docs:
+                self._add(doc_id, minhash(text))
+            self.conn.commit()
+
+    def evict(self):
+        """Drop signatures past the age limit"""
+        with self.lock:
+            if self.max_age:
+                cutoff = time.time() - self.max_age
+                self.conn.execute(
+                    'DELETE FROM buckets WHERE namespace = ? AND doc_id IN'
+                    ' (SELECT doc_id FROM signatures WHERE namespace = ? AND created_at < ?)',
+                    (self.namespace, self.namespace, cutoff)
+                )
+                self.conn.execute('DELETE FROM signatures WHERE namespace = ? AND created_at < ?',
+                                  (self.namespace, cutoff))
+            self.conn.commit()
+
+    def close(self):
+        self.evict()
+        self.conn.close()
+
+    def print_stats(self, label='Near-duplicates'):
+        print(f"\n🧬 {label}: {self.duplicates} of {self.checked} checked "
+              f"(similarity >= {self.threshold:.2f})")
+
+
+_shared_indexes = {}
+_shared_indexes_lock = threading.Lock()
+
+
+def shared_index(namespace, **kwargs):
+    """The process-wide NearDuplicateIndex for a namespace, created on first use"""
+    with _shared_indexes_lock:
+        if namespace not in _shared_indexes:
+            _shared_indexes[namespace] = NearDuplicateIndex(namespace, **kwargs)
+    return _shared_indexes[namespace]
@@ -5,33 +5,20 @@ Official Government Sources Scraper - PROPERLY FILTERED
 ❌ EXCLUDES: Bus operations, awards, vocational licenses, general transport
 """
 
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-from pymongo import MongoClient
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import os
-from dotenv import load_dotenv
 import time
-from pathlib import Path
 import re
+from keyword_matcher import KeywordMatcher
+from scraper_resources import news_collection, close_mongo
+from sentiment_service import shared_sentiment
+from article_pipeline import BulkSaver, run_pipeline
+from http_client import shared_client
+from html_parsing import iter_links, item_links
+from scraper_state import SourceState
+from near_duplicates import shared_index
 
-# Load .env
-project_root = Path(__file__).parent.parent.parent
-env_file = project_root / 'database' / 'scripts' / '.env'
-
-if env_file.exists():
-    load_dotenv(env_file)
-    print(f"✅ Loaded .env from: {env_file}\n")
-
-MONGODB_URI = os.getenv('MONGODB_URI')
-MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'INF2006-Database_Systems')
-
-client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-db = client[MONGODB_DB_NAME]
-collection = db['newsarticles']
-
-analyzer = SentimentIntensityAnalyzer()
+http = shared_client()
+sentiment = shared_sentiment()
 
 TOWNS = [
     'ANG MO KIO', 'BEDOK', 'BISHAN', 'BUKIT BATOK', 'BUKIT MERAH',
@@ -83,6 +70,22 @@ EXCLUDED_KEYWORDS = [
     'challenge shield', 'mot challenge', 'masterplan advisory'
 ]
 
+# Category tags -> trigger words
+CATEGORY_RULES = {
+    ('mrt_expansion', 'infrastructure'): ['mrt', 'lrt', 'line', 'rail', 'station'],
+    ('new_development',): ['bto', 'launch', 'flat', 'tender', 'development'],
+    ('market_trend', 'price_analysis'): ['price', 'resale', 'market', 'transaction'],
+    ('policy_change',): ['policy', 'grant', 'scheme', 'regulation'],
+    ('town_planning',): ['masterplan', 'planning', 'urban'],
+}
+
+MATCHER = KeywordMatcher({
+    'towns': TOWNS,
+    'required': REQUIRED_KEYWORDS,
+    'excluded': EXCLUDED_KEYWORDS,
+    **CATEGORY_RULES
+})
+
 def is_property_related(title, description=''):
     """
     STRICT FILTER: Only property/housing or MRT expansion (property-relevant)
@@ -90,16 +93,15 @@ def is_property_related(title, description=''):
     1. Contains required keywords AND
     2. Does NOT contain excluded keywords
     """
-    text = f"{title} {description}".lower()
+    hits = MATCHER.scan(f"{title} {description}")
     
     # STEP 1: Check for excluded keywords first (immediate rejection)
-    for excluded in EXCLUDED_KEYWORDS:
-        if excluded.lower() in text:
-            print(f"         ❌ EXCLUDED: '{excluded}' found")
-            return False
+    if hits['excluded']:
+        print(f"         ❌ EXCLUDED: '{hits['excluded'][0]}' found")
+        return False
     
     # STEP 2: Must contain at least ONE required keyword
-    found_keywords = [kw for kw in REQUIRED_KEYWORDS if kw in text]
+    found_keywords = hits['required']
     
     if not found_keywords:
         print(f"         ❌ EXCLUDED: No property keywords")
@@ -111,35 +113,19 @@ def is_property_related(title, description=''):
 def extract_locations(text):
     if not text:
         return []
-    locations = set()
-    text_upper = text.upper()
-    for town in TOWNS:
-        if town in text_upper:
-            locations.add(town)
-    return list(locations)
+    return list(MATCHER.scan(text)['towns'])
 
 def categorize(title, desc):
-    text = f"{title} {desc}".lower()
-    cats = []
-    
-    if any(w in text for w in ['mrt', 'lrt', 'line', 'rail', 'station']):
-        cats.extend(['mrt_expansion', 'infrastructure'])
-    if any(w in text for w in ['bto', 'launch', 'flat', 'tender', 'development']):
-        cats.append('new_development')
-    if any(w in text for w in ['price', 'resale', 'market', 'transaction']):
-        cats.extend(['market_trend', 'price_analysis'])
-    if any(w in text for w in ['policy', 'grant', 'scheme', 'regulation']):
-        cats.append('policy_change')
-    if any(w in text for w in ['masterplan', 'planning', 'urban']):
-        cats.append('town_planning')
+    hits = MATCHER.scan(f"{title} {desc}")
+    cats = [cat for rule in CATEGORY_RULES if hits[rule] for cat in rule]
     
     return list(set(cats)) if cats else ['general']
 
 def analyze_sentiment(title):
-    scores = analyzer.polarity_scores(title)
-    compound = scores['compound']
-    label = 'positive' if compound >= 0.1 else ('negative' if compound <= -0.1 else 'neutral')
-    return {'score': round(compound, 2), 'label': label}
+    return sentiment.score(title)
+
+def sentiment_text(article):
+    return article['title']
 
 def assess_impact(categories, sentiment, locations):
     high_positive = ['mrt_expansion', 'infrastructure', 'new_development']
@@ -161,28 +147,55 @@ def assess_impact(categories, sentiment, locations):
         'timeframe': timeframe
     }
 
-def scrape_hdb():
-    """Scrape HDB press releases - property only"""
+def enrich_article(article):
+    """Enrich stage: analysis fields derived from the title"""
+    title = article['title']
+    
+    locs = extract_locations(title) or ['NATIONWIDE']
+    print(f"         📍 {', '.join(locs)}")
+    
+    cats = categorize(title, '')
+    sent = article.get('sentiment') or analyze_sentiment(title)
+    impact = assess_impact(cats, sent, locs)
+    
+    emoji = '😊' if sent['label'] == 'positive' else ('😐' if sent['label'] == 'neutral' else '😞')
+    print(f"         {emoji} {sent['label']} | 🏷️  {', '.join(cats[:2])}\n")
+    
+    article.update({
+        'locations': locs,
+        'categories': cats,
+        'sentiment': sent,
+        'impact_assessment': impact,
+        'keywords': [w.lower() for w in title.split() if len(w) > 4][:10],
+        'view_count': 0,
+        'is_active': True,
+        'scraped_at': datetime.now(),
+        'last_updated': datetime.now()
+    })
+    return article
+
+def scrape_hdb(state=None):
+    """Scrape HDB press releases - property only (yields articles as found)"""
     print("🏛️  Scraping HDB.gov.sg Press Releases...\n")
-    articles = []
+    found = 0
+    scan = state.scan() if state else None
     
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
     
     try:
         url = 'https://www.hdb.gov.sg/about-us/news-and-publications/press-releases'
         print(f"   📡 Fetching {url}...")
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http.get(url, headers=headers, timeout=15, conditional=True,
+                            source=state.source if state else None)
+        if response.status_code == 304:
+            print(f"   ♻️  Not modified since last run, skipping\n")
+            return
         response.raise_for_status()
         print(f"   ✅ Status: {response.status_code}\n")
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        all_links = soup.find_all('a', href=True)
-        
-        for link in all_links:
+        # Releases are kept on their href OR their title, so no selector can narrow this
+        for title, href in iter_links(response.content):
             try:
-                title = link.get_text(strip=True)
-                href = link['href']
-                
                 # Skip short titles or navigation elements
                 if len(title) < 30:
                     continue
@@ -200,6 +213,16 @@ def scrape_hdb():
                 if not (is_press_release or has_news_keywords):
                     continue
                 
+                if not href.startswith('http'):
+                    href = 'https://www.hdb.gov.sg' + href
+                
+                # Stop at the first run of items already seen in earlier runs
+                if scan and not scan.is_new(href):
+                    if scan.stopped:
+                        print(f"      ⏹️  Reached already-seen releases, stopping")
+                        break
+                    continue
+                
                 print(f"      📰 {title[:60]}...")
                 
                 # APPLY FILTER
@@ -207,20 +230,7 @@ def scrape_hdb():
                     print()  # Add spacing
                     continue
                 
-                if not href.startswith('http'):
-                    href = 'https://www.hdb.gov.sg' + href
-                
-                locs = extract_locations(title) or ['NATIONWIDE']
-                print(f"         📍 {', '.join(locs)}")
-                
-                cats = categorize(title, '')
-                sent = analyze_sentiment(title)
-                impact = assess_impact(cats, sent, locs)
-                
-                emoji = '😊' if sent['label'] == 'positive' else ('😐' if sent['label'] == 'neutral' else '😞')
-                print(f"         {emoji} {sent['label']} | 🏷️  {', '.join(cats[:2])}\n")
-                
-                article = {
+                yield {
                     'article_id': f"hdb-gov-{int(datetime.now().timestamp())}-{abs(hash(href)) % 100000}",
                     'title': title,
                     'description': 'HDB press release on housing matters',
@@ -231,21 +241,11 @@ def scrape_hdb():
                         'type': 'government'
                     },
                     'published_at': datetime.now(),
-                    'locations': locs,
-                    'categories': cats,
-                    'sentiment': sent,
-                    'impact_assessment': impact,
-                    'keywords': [w.lower() for w in title.split() if len(w) > 4][:10],
-                    'relevance_score': 0.95,
-                    'view_count': 0,
-                    'is_active': True,
-                    'scraped_at': datetime.now(),
-                    'last_updated': datetime.now()
+                    'relevance_score': 0.95
                 }
+                found += 1
                 
-                articles.append(article)
-                
-                if len(articles) >= 15:
+                if found >= 15:
                     break
                 
             except Exception as e:
@@ -254,36 +254,41 @@ def scrape_hdb():
     except Exception as e:
         print(f"   ❌ HDB error: {str(e)}\n")
     
-    print(f"   ✅ HDB: {len(articles)} property articles\n")
-    return articles
+    print(f"   ✅ HDB: {found} property articles\n")
 
-def scrape_ura():
-    """Scrape URA press releases - property only"""
+def scrape_ura(state=None):
+    """Scrape URA press releases - property only (yields articles as found)"""
     print("🏛️  Scraping URA.gov.sg Press Releases...\n")
-    articles = []
+    found = 0
+    scan = state.scan() if state else None
     
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
     
     try:
         url = 'https://www.ura.gov.sg/Corporate/Media-Room/Media-Releases'
         print(f"   📡 Fetching {url}...")
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http.get(url, headers=headers, timeout=15, conditional=True,
+                            source=state.source if state else None)
+        if response.status_code == 304:
+            print(f"   ♻️  Not modified since last run, skipping\n")
+            return
         response.raise_for_status()
         print(f"   ✅ Status: {response.status_code}\n")
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        all_links = soup.find_all('a', href=True)
-        
-        for link in all_links:
+        # Only media release links are matched by the parser
+        for title, href in iter_links(response.content, href_contains='media-releases'):
             try:
-                title = link.get_text(strip=True)
-                href = link['href']
-                
                 if len(title) < 30:
                     continue
                 
-                # Must be actual media release
-                if 'media-releases' not in href.lower():
+                if not href.startswith('http'):
+                    href = 'https://www.ura.gov.sg' + href
+                
+                # Stop at the first run of items already seen in earlier runs
+                if scan and not scan.is_new(href):
+                    if scan.stopped:
+                        print(f"      ⏹️  Reached already-seen releases, stopping")
+                        break
                     continue
                 
                 print(f"      📰 {title[:60]}...")
@@ -293,20 +298,7 @@ def scrape_ura():
                     print()
                     continue
                 
-                if not href.startswith('http'):
-                    href = 'https://www.ura.gov.sg' + href
-                
-                locs = extract_locations(title) or ['NATIONWIDE']
-                print(f"         📍 {', '.join(locs)}")
-                
-                cats = categorize(title, '')
-                sent = analyze_sentiment(title)
-                impact = assess_impact(cats, sent, locs)
-                
-                emoji = '😊' if sent['label'] == 'positive' else ('😐' if sent['label'] == 'neutral' else '😞')
-                print(f"         {emoji} {sent['label']} | 🏷️  {', '.join(cats[:2])}\n")
-                
-                article = {
+                yield {
                     'article_id': f"ura-gov-{int(datetime.now().timestamp())}-{abs(hash(href)) % 100000}",
                     'title': title,
                     'description': 'URA press release on property and urban planning',
@@ -317,21 +309,11 @@ def scrape_ura():
                         'type': 'government'
                     },
                     'published_at': datetime.now(),
-                    'locations': locs,
-                    'categories': cats,
-                    'sentiment': sent,
-                    'impact_assessment': impact,
-                    'keywords': [w.lower() for w in title.split() if len(w) > 4][:10],
-                    'relevance_score': 0.95,
-                    'view_count': 0,
-                    'is_active': True,
-                    'scraped_at': datetime.now(),
-                    'last_updated': datetime.now()
+                    'relevance_score': 0.95
                 }
+                found += 1
                 
-                articles.append(article)
-                
-                if len(articles) >= 15:
+                if found >= 15:
                     break
                 
             except Exception as e:
@@ -340,43 +322,50 @@ def scrape_ura():
     except Exception as e:
         print(f"   ❌ URA error: {str(e)}\n")
     
-    print(f"   ✅ URA: {len(articles)} property articles\n")
-    return articles
+    print(f"   ✅ URA: {found} property articles\n")
 
-def scrape_lta():
-    """Scrape LTA - MRT expansion ONLY (property-relevant), NO bus operations/awards"""
+def scrape_lta(state=None):
+    """Scrape LTA - MRT expansion ONLY (property-relevant), NO bus operations/awards (yields articles as found)"""
     print("🏛️  Scraping LTA.gov.sg News Releases...\n")
     print("   ⚠️  FILTERING OUT: Bus operations, awards, licenses\n")
-    articles = []
+    found = 0
+    scan = state.scan() if state else None
     
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
     
     try:
         url = 'https://www.lta.gov.sg/content/ltagov/en/newsroom.html'
         print(f"   📡 Fetching {url}...")
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http.get(url, headers=headers, timeout=15, conditional=True,
+                            source=state.source if state else None)
+        if response.status_code == 304:
+            print(f"   ♻️  Not modified since last run, skipping\n")
+            return
         response.raise_for_status()
         print(f"   ✅ Status: {response.status_code}\n")
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        news_items = soup.find_all('li', class_='item')
+        news_items = item_links(response.content, 'li.item', 'h5.title')
         
         print(f"   📊 Found {len(news_items)} total news items\n")
         
-        for item in news_items[:50]:
+        for link in news_items[:50]:
             try:
-                title_elem = item.find('h5', class_='title')
-                if not title_elem:
+                if not link:
                     continue
                 
-                link_elem = title_elem.find('a', href=True)
-                if not link_elem:
+                title, href = link
+                
+                if len(title) < 20:
                     continue
                 
-                title = link_elem.get_text(strip=True)
-                href = link_elem['href']
+                if not href.startswith('http'):
+                    href = 'https://www.lta.gov.sg' + href
                 
-                if len(title) < 20:
+                # Stop at the first run of items already seen in earlier runs
+                if scan and not scan.is_new(href):
+                    if scan.stopped:
+                        print(f"      ⏹️  Reached already-seen releases, stopping")
+                        break
                     continue
                 
                 print(f"      📰 {title[:60]}...")
@@ -386,20 +375,7 @@ def scrape_lta():
                     print()
                     continue
                 
-                if not href.startswith('http'):
-                    href = 'https://www.lta.gov.sg' + href
-                
-                locs = extract_locations(title) or ['NATIONWIDE']
-                print(f"         📍 {', '.join(locs)}")
-                
-                cats = categorize(title, '')
-                sent = analyze_sentiment(title)
-                impact = assess_impact(cats, sent, locs)
-                
-                emoji = '😊' if sent['label'] == 'positive' else ('😐' if sent['label'] == 'neutral' else '😞')
-                print(f"         {emoji} {sent['label']} | 🏷️  {', '.join(cats[:2])}\n")
-                
-                article = {
+                yield {
                     'article_id': f"lta-gov-{int(datetime.now().timestamp())}-{abs(hash(href)) % 100000}",
                     'title': title,
                     'description': 'LTA news on MRT expansion and rail infrastructure',
@@ -410,21 +386,11 @@ def scrape_lta():
                         'type': 'government'
                     },
                     'published_at': datetime.now(),
-                    'locations': locs,
-                    'categories': cats,
-                    'sentiment': sent,
-                    'impact_assessment': impact,
-                    'keywords': [w.lower() for w in title.split() if len(w) > 4][:10],
-                    'relevance_score': 0.90,
-                    'view_count': 0,
-                    'is_active': True,
-                    'scraped_at': datetime.now(),
-                    'last_updated': datetime.now()
+                    'relevance_score': 0.90
                 }
+                found += 1
                 
-                articles.append(article)
-                
-                if len(articles) >= 10:
+                if found >= 10:
                     break
                 
             except Exception as e:
@@ -433,34 +399,17 @@ def scrape_lta():
     except Exception as e:
         print(f"   ❌ LTA error: {str(e)}\n")
     
-    print(f"   ✅ LTA: {len(articles)} MRT expansion articles\n")
-    return articles
+    print(f"   ✅ LTA: {found} MRT expansion articles\n")
 
-def save_to_mongodb(articles):
-    if not articles:
-        print("\nNo articles to save\n")
-        return
-    
-    print(f"\n💾 Saving {len(articles)} articles...")
-    
-    saved = 0
-    updated = 0
-    
-    for article in articles:
-        try:
-            if collection.find_one({'url': article['url']}):
-                collection.update_one(
-                    {'url': article['url']},
-                    {'$set': {'last_updated': datetime.now()}}
-                )
-                updated += 1
-            else:
-                collection.insert_one(article)
-                saved += 1
-        except Exception as e:
-            print(f"   ⚠️  Error: {str(e)}")
-    
-    print(f"   ✅ Saved: {saved} | 🔄 Updated: {updated}")
+def official_articles(states):
+    """All three sources as one stream, pausing between sites"""
+    yield from scrape_hdb(states['hdb'])
+    time.sleep(2)
+    
+    yield from scrape_ura(states['ura'])
+    time.sleep(2)
+    
+    yield from scrape_lta(states['lta'])
 
 def main():
     print("\n" + "="*70)
@@ -471,44 +420,42 @@ def main():
     print("="*70)
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
-    all_articles = []
-    
-    all_articles.extend(scrape_hdb())
-    time.sleep(2)
-    
-    all_articles.extend(scrape_ura())
-    time.sleep(2)
-    
-    all_articles.extend(scrape_lta())
+    # Per-source high-water marks: listings are only scanned down to known releases
+    states = {name: SourceState(name) for name in ('hdb', 'ura', 'lta')}
+    
+    # Existing articles only get their timestamp refreshed
+    saver = BulkSaver(news_collection(), key='url', update_fields=['last_updated'])
+    near_dups = shared_index('news')
+    stats = run_pipeline(official_articles(states), saver, key='url', enrich=enrich_article, near_dups=near_dups,
+                         sentiment_text=sentiment_text)
+    saver.close()
+    
+    # Results are saved, so later runs may skip unchanged pages
+    if saver.counts['failed']:
+        print("\n⚠️  Some saves failed; crawl state not advanced")
+        for name in states:
+            http.discard_validators(name)
+    else:
+        for name, state in states.items():
+            state.save()
+            http.commit_validators(name)
     
     print("\n" + "="*70)
-    print(f"📈 TOTAL FOUND: {len(all_articles)} articles")
+    print(f"📈 TOTAL FOUND: {stats.total} articles")
     print("="*70)
     
-    if all_articles:
-        stats = {}
-        for a in all_articles:
-            stats[a['sentiment']['label']] = stats.get(a['sentiment']['label'], 0) + 1
-        
-        print(f"\n😊 Sentiment:")
-        print(f"   Positive: {stats.get('positive', 0)} | "
-              f"Neutral: {stats.get('neutral', 0)} | "
-              f"Negative: {stats.get('negative', 0)}")
-        
-        sources = {}
-        for a in all_articles:
-            src = a['source']['name']
-            sources[src] = sources.get(src, 0) + 1
+    if stats.total:
+        stats.print_summary()
+        saver.print_counts()
         
-        print(f"\n📊 By Source:")
-        for src, count in sources.items():
-            print(f"   {src}: {count} articles")
-        
-        save_to_mongodb(all_articles)
-        
-        print(f"\n📦 Total in database: {collection.count_documents({})}")
+        print(f"\n📦 Total in database: {news_collection().count_documents({})}")
+    
+    http.print_stats()
+    sentiment.print_stats()
+    near_dups.print_stats()
+    near_dups.close()
     
-    client.close()
+    close_mongo()
     print(f"\n✅ Complete! {datetime.now().strftime('%H:%M:%S')}")
     print("="*70 + "\n")
 
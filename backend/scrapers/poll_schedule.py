@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-source polling schedule for daemon mode
+- Each source has its own interval within [min, max] seconds
+- A run that finds new articles halves the interval; a quiet or failed run
+  stretches it by 1.5x, so busy feeds are polled often and static sites rarely
+- Learned intervals are kept in the source's scraper_state document so a
+  restarted daemon picks up where it left off
+"""
+
+import os
+import random
+import time
+from datetime import datetime
+
+SPEEDUP = float(os.getenv('POLL_SPEEDUP', '0.5'))
+BACKOFF = float(os.getenv('POLL_BACKOFF', '1.5'))
+JITTER = 0.1
+
+
+class PollSchedule:
+    def __init__(self, bounds, state_collection=None):
+        """
+        bounds: {name: (initial, min, max)} intervals in seconds
+        state_collection: scraper_state collection used to persist intervals
+        """
+        self.bounds = bounds
+        self.state_collection = state_collection
+        self.intervals = {name: initial for name, (initial, _, _) in bounds.items()}
+
+        if state_collection is not None:
+            for doc in state_collection.find({'_id': {'$in': list(bounds)}, 'poll_interval': {'$exists': True}}):
+                _, low, high = bounds[doc['_id']]
+                self.intervals[doc['_id']] = min(high, max(low, doc['poll_interval']))
+
+        # Everything is due immediately on start
+        now = time.monotonic()
+        self.next_run = {name: now for name in bounds}
+
+    def due(self, now, running=()):
+        """Names whose next run has come, earliest first"""
+        ready = [name for name, at in self.next_run.items() if at <= now and name not in running]
+        return sorted(ready, key=self.next_run.get)
+
+    def seconds_until_next(self, now, running=()):
+        waiting = [at for name, at in self.next_run.items() if name not in running]
+        return max(0.0, min(waiting) - now) if waiting else None
+
+    def record(self, name, new_items, ok=True):
+        """Adapt the interval after a run and schedule the next one; returns the interval"""
+        _, low, high = self.bounds[name]
+        factor = SPEEDUP if ok and new_items else BACKOFF
+        interval = min(high, max(low, self.intervals[name] * factor))
+        self.intervals[name] = interval
+
+        jittered = interval * random.uniform(1 - JITTER, 1 + JITTER)
+        self.next_run[name] = time.monotonic() + jittered
+
+        if self.state_collection is not None:
+            self.state_collection.update_one(
+                {'_id': name},
+                {'$set': {'poll_interval': interval, 'last_polled_at': datetime.now()}},
+                upsert=True
+            )
+        return interval
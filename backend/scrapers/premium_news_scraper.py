@@ -18,26 +18,43 @@ Filters OUT irrelevant content like:
 
 import os
 import sys
+import argparse
+import threading
+from functools import partial
 from datetime import datetime
 import time
-from dotenv import load_dotenv
-from pymongo import MongoClient
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 import hashlib
 import re
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+from keyword_matcher import KeywordMatcher
+from scraper_resources import news_collection, close_mongo
+from article_pipeline import BulkSaver, EnrichmentPool, run_pipeline, parallel_stream, ENRICH_PROCESSES
+from driver_pool import DriverPool
+from http_client import shared_client
+from sentiment_service import shared_sentiment
+from scraper_state import SourceState
+from near_duplicates import shared_index
 
-# Load environment
-load_dotenv()
+# Maximum concurrent headless browsers (one per worker)
+MAX_BROWSERS = int(os.getenv('PREMIUM_MAX_BROWSERS', '2'))
 
-# MongoDB connection
-MONGODB_URI = os.getenv('MONGODB_URI')
-MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'INF2006-Database_Systems')
+# Condition-based waits: max seconds for the page to load, for the first card,
+# and per scroll for more cards
+PAGE_LOAD_TIMEOUT = int(os.getenv('PREMIUM_PAGE_LOAD_TIMEOUT', '30'))
+PAGE_READY_TIMEOUT = int(os.getenv('PREMIUM_PAGE_READY_TIMEOUT', '15'))
+SCROLL_WAIT_TIMEOUT = 3
+
+# Seconds from driver.get() until cards were ready, per site (None = timed out)
+page_ready_latency = {}
 
 # Keywords that MUST be present (property-related)
 REQUIRED_KEYWORDS = [
@@ -57,6 +74,41 @@ EXCLUDED_KEYWORDS = [
     'cycling', 'bicycle', 'pcn', 'park connector'
 ]
 
+TOWNS = [
+    'ANG MO KIO', 'BEDOK', 'BISHAN', 'BUKIT BATOK', 'BUKIT MERAH', 'BUKIT PANJANG',
+    'BUKIT TIMAH', 'CENTRAL', 'CHOA CHU KANG', 'CLEMENTI', 'GEYLANG', 'HOUGANG',
+    'JURONG EAST', 'JURONG WEST', 'KALLANG', 'MARINE PARADE', 'PASIR RIS', 'PUNGGOL',
+    'QUEENSTOWN', 'SEMBAWANG', 'SENGKANG', 'SERANGOON', 'TAMPINES', 'TOA PAYOH',
+    'WOODLANDS', 'YISHUN'
+]
+
+# Category tags -> trigger words
+CATEGORY_RULES = {
+    ('new_development',): ['bto', 'launch', 'ballot'],
+    ('price_analysis',): ['price', 'cost', 'valuation', 'resale'],
+    ('infrastructure',): ['mrt', 'lrt', 'transport', 'station'],
+    ('policy_change',): ['policy', 'regulation', 'rule', 'scheme'],
+    ('market_trend',): ['market', 'trend', 'demand', 'supply'],
+}
+
+MATCHER = KeywordMatcher({
+    'towns': TOWNS,
+    'required': REQUIRED_KEYWORDS,
+    'excluded': EXCLUDED_KEYWORDS,
+    **CATEGORY_RULES
+})
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def get_driver_path():
+    """Resolve chromedriver once per process instead of once per browser"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
 def setup_driver():
     """Setup Selenium WebDriver with Chrome"""
     chrome_options = Options()
@@ -66,7 +118,7 @@ def setup_driver():
     chrome_options.add_argument('--disable-blink-features=AutomationControlled')
     chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(get_driver_path())
     driver = webdriver.Chrome(service=service, options=chrome_options)
     return driver
 
@@ -75,16 +127,15 @@ def is_property_related(title, description):
     Strict filter: Only property/housing-related content
     Returns True if content is relevant, False otherwise
     """
-    text = f"{title} {description}".lower()
+    hits = MATCHER.scan(f"{title} {description}")
     
     # Check for excluded keywords first (immediate rejection)
-    for excluded in EXCLUDED_KEYWORDS:
-        if excluded.lower() in text:
-            print(f"   ❌ EXCLUDED: Contains '{excluded}'")
-            return False
+    if hits['excluded']:
+        print(f"   ❌ EXCLUDED: Contains '{hits['excluded'][0]}'")
+        return False
     
     # Must contain at least one required keyword
-    found_keywords = [kw for kw in REQUIRED_KEYWORDS if kw in text]
+    found_keywords = hits['required']
     
     if not found_keywords:
         print(f"   ❌ EXCLUDED: No property keywords found")
@@ -93,433 +144,400 @@ def is_property_related(title, description):
     print(f"   ✅ RELEVANT: Found keywords: {', '.join(found_keywords[:3])}")
     return True
 
+def time_left(deadline, limit=None):
+    """
+    Seconds for one wait: limit (None = unbounded), cut short by the deadline.
+    Raises TimeoutError once the deadline has passed.
+    """
+    if deadline is None:
+        return limit
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError('source deadline passed')
+    return left if limit is None else min(limit, left)
+
+def load_cards(driver, site, url, card_selector, min_cards=0, max_scrolls=0, deadline=None):
+    """
+    Open a listing page and return its card elements as soon as they are present.
+    If min_cards is set, scroll (up to max_scrolls times) until that many cards
+    have loaded or scrolling stops producing new ones.
+    Every wait is bounded by the deadline (a time.monotonic() value), if given.
+    """
+    started = time.monotonic()
+    
+    try:
+        driver.set_page_load_timeout(time_left(deadline, PAGE_LOAD_TIMEOUT))
+        driver.get(url)
+        WebDriverWait(driver, time_left(deadline, PAGE_READY_TIMEOUT)).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, card_selector))
+        )
+    except TimeoutException:
+        page_ready_latency[site] = None
+        time_left(deadline)
+        print(f"   ⚠️  No cards after {time.monotonic() - started:.0f}s")
+        return []
+    
+    cards = driver.find_elements(By.CSS_SELECTOR, card_selector)
+    
+    for _ in range(max_scrolls):
+        if len(cards) >= min_cards:
+            break
+        
+        loaded = len(cards)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            WebDriverWait(driver, time_left(deadline, SCROLL_WAIT_TIMEOUT)).until(
+                lambda d: len(d.find_elements(By.CSS_SELECTOR, card_selector)) > loaded
+            )
+        except TimeoutException:
+            break
+        cards = driver.find_elements(By.CSS_SELECTOR, card_selector)
+    
+    page_ready_latency[site] = time.monotonic() - started
+    return cards
+
 def generate_article_id(source, url, published_date):
     """Generate unique article ID"""
     unique_string = f"{source}-{url}-{published_date}"
     return hashlib.md5(unique_string.encode()).hexdigest()[:16]
 
 def analyze_sentiment(text):
-    """Simple sentiment analysis"""
-    text_lower = text.lower()
-    
-    positive_words = ['launch', 'new', 'increase', 'growth', 'boost', 'improve', 
-                      'upgrade', 'benefit', 'success', 'positive', 'rise', 'up']
-    negative_words = ['decline', 'drop', 'decrease', 'fall', 'shortage', 'concern',
-                      'issue', 'problem', 'crisis', 'delay', 'cancel']
-    
-    pos_count = sum(1 for word in positive_words if word in text_lower)
-    neg_count = sum(1 for word in negative_words if word in text_lower)
-    
-    if pos_count > neg_count:
-        return {'label': 'positive', 'score': 0.6}
-    elif neg_count > pos_count:
-        return {'label': 'negative', 'score': 0.6}
-    return {'label': 'neutral', 'score': 0.5}
+    """Sentiment analysis"""
+    return shared_sentiment().score(text)
+
+def sentiment_text(article):
+    """Text an article is scored on: title and description"""
+    return f"{article['title']} {article['description']}"
 
 def extract_categories(text):
     """Extract relevant categories from text"""
-    text_lower = text.lower()
-    categories = []
-    
-    if any(word in text_lower for word in ['bto', 'launch', 'ballot']):
-        categories.append('new_development')
-    if any(word in text_lower for word in ['price', 'cost', 'valuation', 'resale']):
-        categories.append('price_analysis')
-    if any(word in text_lower for word in ['mrt', 'lrt', 'transport', 'station']):
-        categories.append('infrastructure')
-    if any(word in text_lower for word in ['policy', 'regulation', 'rule', 'scheme']):
-        categories.append('policy_change')
-    if any(word in text_lower for word in ['market', 'trend', 'demand', 'supply']):
-        categories.append('market_trend')
+    hits = MATCHER.scan(text)
+    categories = [cat for rule in CATEGORY_RULES if hits[rule] for cat in rule]
     
     return categories if categories else ['general']
 
 def extract_locations(text):
     """Extract Singapore town names from text"""
-    towns = [
-        'ANG MO KIO', 'BEDOK', 'BISHAN', 'BUKIT BATOK', 'BUKIT MERAH', 'BUKIT PANJANG',
-        'BUKIT TIMAH', 'CENTRAL', 'CHOA CHU KANG', 'CLEMENTI', 'GEYLANG', 'HOUGANG',
-        'JURONG EAST', 'JURONG WEST', 'KALLANG', 'MARINE PARADE', 'PASIR RIS', 'PUNGGOL',
-        'QUEENSTOWN', 'SEMBAWANG', 'SENGKANG', 'SERANGOON', 'TAMPINES', 'TOA PAYOH',
-        'WOODLANDS', 'YISHUN'
-    ]
+    found_locations = list(MATCHER.scan(text)['towns'])
     
-    found_locations = []
-    text_upper = text.upper()
+    return found_locations if found_locations else ['NATIONWIDE']
+
+# Per-source strategy table: where the listing is, how to read a card,
+# and which fetch paths to try in order ('http' first, 'browser' as fallback)
+SOURCES = {
+    'Business Times': {
+        'url': 'https://www.businesstimes.com.sg/keywords/hdb',
+        'site_url': 'https://www.businesstimes.com.sg',
+        'type': 'news_media',
+        'strategies': ['http', 'browser'],
+        'card': 'div.media-card, article.story-card',
+        'title': 'h2.card-title, h3.card-title, a.headline',
+        'description': 'p.card-text, div.description',
+        'date': None,
+        'limit': 15,
+        'relevance': 0.9
+    },
+    'The Straits Times': {
+        'url': 'https://www.straitstimes.com/search?searchkey=hdb&sort=relevancydate',
+        'site_url': 'https://www.straitstimes.com',
+        'type': 'news_media',
+        'strategies': ['http', 'browser'],
+        'card': 'div.card-list-item, article.story-card',
+        'title': 'h3.card-headline, a.headline',
+        'description': 'p.card-description, div.description',
+        'date': 'time, span.date',
+        'limit': 15,
+        'relevance': 0.9
+    },
+    'CNA': {
+        'url': 'https://www.channelnewsasia.com/topic/hdb',
+        'site_url': 'https://www.channelnewsasia.com',
+        'type': 'news_media',
+        'strategies': ['http', 'browser'],
+        'card': 'div.list-object, article.teaser',
+        'title': 'h3, h6, a.title',
+        'description': 'p.description, div.teaser__description',
+        'date': 'time, span.date',
+        'limit': 15,
+        'min_cards': 15,
+        'max_scrolls': 3,
+        'relevance': 0.9
+    },
+    'PropertyGuru': {
+        'url': 'https://www.propertyguru.com.sg/property-management-news',
+        'site_url': 'https://www.propertyguru.com.sg',
+        'type': 'property_portal',
+        'strategies': ['http', 'browser'],
+        'card': 'article.news-card, div.article-item',
+        'title': 'h2, h3, a.title',
+        'description': 'p, div.description',
+        'date': None,
+        'limit': 10,
+        'relevance': 0.95
+    }
+}
+
+HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+# How often each fetch path produced the cards, per source
+path_hits = {name: {'http': 0, 'browser': 0, 'none': 0} for name in SOURCES}
+
+class SeleniumCard:
+    """Card backed by a Selenium WebElement"""
     
-    for town in towns:
-        if town in text_upper:
-            found_locations.append(town)
+    def __init__(self, elem):
+        self.elem = elem
     
-    return found_locations if found_locations else ['NATIONWIDE']
+    def text(self, selector):
+        return self.elem.find_element(By.CSS_SELECTOR, selector).text.strip()
+    
+    def attr(self, selector, name):
+        return self.elem.find_element(By.CSS_SELECTOR, selector).get_attribute(name)
 
-def scrape_business_times(driver):
-    """Scrape Business Times - HDB news"""
-    print("\n📰 Scraping Business Times...")
-    url = "https://www.businesstimes.com.sg/keywords/hdb"
-    articles = []
+class SoupCard:
+    """Card backed by a BeautifulSoup tag, with the same interface as SeleniumCard"""
     
+    def __init__(self, elem):
+        self.elem = elem
+    
+    def _select(self, selector):
+        found = self.elem.select_one(selector)
+        if found is None:
+            raise LookupError(selector)
+        return found
+    
+    def text(self, selector):
+        return self._select(selector).get_text(' ', strip=True)
+    
+    def attr(self, selector, name):
+        return self._select(selector).get(name)
+
+def fetch_cards_http(source):
+    """Fast path: plain HTTP fetch parsed with the same card selector"""
     try:
-        driver.get(url)
-        time.sleep(3)
-        
-        # Find article elements
-        article_elements = driver.find_elements(By.CSS_SELECTOR, "div.media-card, article.story-card")
-        
-        print(f"   Found {len(article_elements)} potential articles")
-        
-        for elem in article_elements[:15]:  # Limit to 15 most recent
-            try:
-                # Extract title
-                title_elem = elem.find_element(By.CSS_SELECTOR, "h2.card-title, h3.card-title, a.headline")
-                title = title_elem.text.strip()
-                
-                # Extract link
-                link_elem = elem.find_element(By.CSS_SELECTOR, "a")
-                link = link_elem.get_attribute('href')
-                if not link.startswith('http'):
-                    link = f"https://www.businesstimes.com.sg{link}"
-                
-                # Extract description
-                try:
-                    desc_elem = elem.find_element(By.CSS_SELECTOR, "p.card-text, div.description")
-                    description = desc_elem.text.strip()
-                except:
-                    description = title
-                
-                # Filter: Only property-related
-                if not is_property_related(title, description):
-                    continue
-                
-                # Extract date
-                try:
-                    date_elem = elem.find_element(By.CSS_SELECTOR, "time, span.date")
-                    date_text = date_elem.get_attribute('datetime') or date_elem.text
-                    published_date = datetime.now().isoformat()  # Fallback
-                except:
-                    published_date = datetime.now().isoformat()
-                
-                article = {
-                    'article_id': generate_article_id('Business Times', link, published_date),
-                    'title': title,
-                    'description': description,
-                    'url': link,
-                    'source': {
-                        'name': 'Business Times',
-                        'url': 'https://www.businesstimes.com.sg',
-                        'type': 'news_media'
-                    },
-                    'published_at': published_date,
-                    'scraped_at': datetime.now().isoformat(),
-                    'locations': extract_locations(f"{title} {description}"),
-                    'categories': extract_categories(f"{title} {description}"),
-                    'sentiment': analyze_sentiment(f"{title} {description}"),
-                    'impact_assessment': {
-                        'predicted_impact': 'moderate_positive',
-                        'affected_areas': extract_locations(f"{title} {description}"),
-                        'timeframe': 'short_term'
-                    },
-                    'keywords': [w for w in REQUIRED_KEYWORDS if w in f"{title} {description}".lower()][:5],
-                    'relevance_score': 0.9,
-                    'view_count': 0,
-                    'is_active': True
-                }
-                
-                articles.append(article)
-                print(f"   ✅ Added: {title[:60]}...")
-                
-            except Exception as e:
-                continue
-        
-        print(f"   ✅ Business Times: {len(articles)} relevant articles")
-        return articles
-        
+        response = shared_client().get(source['url'], headers=HTTP_HEADERS, timeout=15)
+        response.raise_for_status()
     except Exception as e:
-        print(f"   ❌ Error scraping Business Times: {e}")
+        print(f"   ⚠️  HTTP fast path failed: {str(e)[:80]}")
         return []
+    
+    soup = BeautifulSoup(response.content, 'html.parser')
+    return [SoupCard(elem) for elem in soup.select(source['card'])]
 
-def scrape_straits_times(driver):
-    """Scrape The Straits Times - HDB search"""
-    print("\n📰 Scraping The Straits Times...")
-    url = "https://www.straitstimes.com/search?searchkey=hdb&sort=relevancydate"
-    articles = []
+def fetch_cards_browser(name, source, pool, deadline=None):
+    """Slow path: render the page in a pooled headless browser"""
+    driver = pool.acquire(timeout=time_left(deadline))
+    try:
+        elements = load_cards(driver, name, source['url'], source['card'],
+                              min_cards=source.get('min_cards', 0),
+                              max_scrolls=source.get('max_scrolls', 0),
+                              deadline=deadline)
+        # Read cards while we still hold the browser
+        cards = [snapshot_card(SeleniumCard(elem), source) for elem in elements[:source['limit']]]
+        return [card for card in cards if card]
+    finally:
+        pool.release(driver)
+
+def snapshot_card(card, source):
+    """Read the fields we need from a card into a plain dict (None if unusable)"""
+    try:
+        title = card.text(source['title'])
+        link = urljoin(source['site_url'], card.attr('a', 'href'))
+    except Exception:
+        return None
     
     try:
-        driver.get(url)
-        time.sleep(3)
-        
-        # Find article elements
-        article_elements = driver.find_elements(By.CSS_SELECTOR, "div.card-list-item, article.story-card")
-        
-        print(f"   Found {len(article_elements)} potential articles")
-        
-        for elem in article_elements[:15]:
-            try:
-                # Extract title
-                title_elem = elem.find_element(By.CSS_SELECTOR, "h3.card-headline, a.headline")
-                title = title_elem.text.strip()
-                
-                # Extract link
-                link_elem = elem.find_element(By.CSS_SELECTOR, "a")
-                link = link_elem.get_attribute('href')
-                if not link.startswith('http'):
-                    link = f"https://www.straitstimes.com{link}"
-                
-                # Extract description
-                try:
-                    desc_elem = elem.find_element(By.CSS_SELECTOR, "p.card-description, div.description")
-                    description = desc_elem.text.strip()
-                except:
-                    description = title
-                
-                # Filter: Only property-related
-                if not is_property_related(title, description):
-                    continue
-                
-                # Extract date
-                try:
-                    date_elem = elem.find_element(By.CSS_SELECTOR, "time, span.date")
-                    published_date = date_elem.get_attribute('datetime') or datetime.now().isoformat()
-                except:
-                    published_date = datetime.now().isoformat()
-                
-                article = {
-                    'article_id': generate_article_id('The Straits Times', link, published_date),
-                    'title': title,
-                    'description': description,
-                    'url': link,
-                    'source': {
-                        'name': 'The Straits Times',
-                        'url': 'https://www.straitstimes.com',
-                        'type': 'news_media'
-                    },
-                    'published_at': published_date,
-                    'scraped_at': datetime.now().isoformat(),
-                    'locations': extract_locations(f"{title} {description}"),
-                    'categories': extract_categories(f"{title} {description}"),
-                    'sentiment': analyze_sentiment(f"{title} {description}"),
-                    'impact_assessment': {
-                        'predicted_impact': 'moderate_positive',
-                        'affected_areas': extract_locations(f"{title} {description}"),
-                        'timeframe': 'short_term'
-                    },
-                    'keywords': [w for w in REQUIRED_KEYWORDS if w in f"{title} {description}".lower()][:5],
-                    'relevance_score': 0.9,
-                    'view_count': 0,
-                    'is_active': True
-                }
-                
-                articles.append(article)
-                print(f"   ✅ Added: {title[:60]}...")
-                
-            except Exception as e:
-                continue
-        
-        print(f"   ✅ Straits Times: {len(articles)} relevant articles")
-        return articles
-        
-    except Exception as e:
-        print(f"   ❌ Error scraping Straits Times: {e}")
-        return []
+        description = card.text(source['description'])
+    except Exception:
+        description = title
+    
+    published_date = None
+    if source['date']:
+        try:
+            published_date = card.attr(source['date'], 'datetime')
+        except Exception:
+            pass
+    
+    return {'title': title, 'link': link, 'description': description, 'published_date': published_date}
 
-def scrape_cna(driver):
-    """Scrape CNA - HDB topic"""
-    print("\n📰 Scraping Channel NewsAsia...")
-    url = "https://www.channelnewsasia.com/topic/hdb"
-    articles = []
+def build_article(name, source, fields):
+    link = fields['link']
+    published_date = fields['published_date'] or datetime.now().isoformat()
+    
+    return {
+        'article_id': generate_article_id(name, link, published_date),
+        'title': fields['title'],
+        'description': fields['description'],
+        'url': link,
+        'source': {
+            'name': name,
+            'url': source['site_url'],
+            'type': source['type']
+        },
+        'published_at': published_date,
+        'scraped_at': datetime.now().isoformat(),
+        'relevance_score': source['relevance']
+    }
+
+def enrich_article(article):
+    """Enrich stage: text analysis, safe to run in a worker process"""
+    text = sentiment_text(article)
+    locations = extract_locations(text)
+    
+    article.update({
+        'locations': locations,
+        'categories': extract_categories(text),
+        'sentiment': article.get('sentiment') or analyze_sentiment(text),
+        'impact_assessment': {
+            'predicted_impact': 'moderate_positive',
+            'affected_areas': locations,
+            'timeframe': 'short_term'
+        },
+        'keywords': list(MATCHER.scan(text)['required'][:5]),
+        'view_count': 0,
+        'is_active': True
+    })
+    return article
+
+def scrape_source(name, pool, state=None, deadline=None):
+    """
+    Scrape one source using its strategy list: the HTTP fast path first,
+    escalating to a pooled browser only when it yields zero cards.
+    Yields relevant articles as they are built. With a SourceState, cards
+    are only processed down to the first run of already-seen links.
+    With a deadline, waiting for a browser or a page raises TimeoutError
+    once it has passed.
+    """
+    print(f"\n📰 Scraping {name}...")
+    source = SOURCES[name]
+    found = 0
+    scan = state.scan() if state else None
     
     try:
-        driver.get(url)
-        time.sleep(3)
-        
-        # Scroll to load more
-        driver.execute_script("window.scrollTo(0, 1500);")
-        time.sleep(2)
-        
-        # Find article elements
-        article_elements = driver.find_elements(By.CSS_SELECTOR, "div.list-object, article.teaser")
-        
-        print(f"   Found {len(article_elements)} potential articles")
-        
-        for elem in article_elements[:15]:
-            try:
-                # Extract title
-                title_elem = elem.find_element(By.CSS_SELECTOR, "h3, h6, a.title")
-                title = title_elem.text.strip()
-                
-                # Extract link
-                link_elem = elem.find_element(By.CSS_SELECTOR, "a")
-                link = link_elem.get_attribute('href')
-                if not link.startswith('http'):
-                    link = f"https://www.channelnewsasia.com{link}"
-                
-                # Extract description
-                try:
-                    desc_elem = elem.find_element(By.CSS_SELECTOR, "p.description, div.teaser__description")
-                    description = desc_elem.text.strip()
-                except:
-                    description = title
-                
-                # Filter: Only property-related
-                if not is_property_related(title, description):
-                    continue
-                
-                # Extract date
-                try:
-                    date_elem = elem.find_element(By.CSS_SELECTOR, "time, span.date")
-                    published_date = date_elem.get_attribute('datetime') or datetime.now().isoformat()
-                except:
-                    published_date = datetime.now().isoformat()
-                
-                article = {
-                    'article_id': generate_article_id('CNA', link, published_date),
-                    'title': title,
-                    'description': description,
-                    'url': link,
-                    'source': {
-                        'name': 'CNA',
-                        'url': 'https://www.channelnewsasia.com',
-                        'type': 'news_media'
-                    },
-                    'published_at': published_date,
-                    'scraped_at': datetime.now().isoformat(),
-                    'locations': extract_locations(f"{title} {description}"),
-                    'categories': extract_categories(f"{title} {description}"),
-                    'sentiment': analyze_sentiment(f"{title} {description}"),
-                    'impact_assessment': {
-                        'predicted_impact': 'moderate_positive',
-                        'affected_areas': extract_locations(f"{title} {description}"),
-                        'timeframe': 'short_term'
-                    },
-                    'keywords': [w for w in REQUIRED_KEYWORDS if w in f"{title} {description}".lower()][:5],
-                    'relevance_score': 0.9,
-                    'view_count': 0,
-                    'is_active': True
-                }
-                
-                articles.append(article)
-                print(f"   ✅ Added: {title[:60]}...")
-                
-            except Exception as e:
+        cards = []
+        for strategy in source['strategies']:
+            if strategy == 'http':
+                cards = [snapshot_card(card, source) for card in fetch_cards_http(source)[:source['limit']]]
+                cards = [card for card in cards if card]
+            else:
+                cards = fetch_cards_browser(name, source, pool, deadline)
+            
+            if cards:
+                path_hits[name][strategy] += 1
+                print(f"   Found {len(cards)} potential articles via {strategy}")
+                break
+            print(f"   ↪️  {strategy}: no cards")
+        else:
+            path_hits[name]['none'] += 1
+        
+        for fields in cards:
+            if scan and not scan.is_new(fields['link']):
+                if scan.stopped:
+                    print(f"   ⏹️  Reached already-seen articles, stopping")
+                    break
+                continue
+            
+            # Filter: Only property-related
+            if not is_property_related(fields['title'], fields['description']):
                 continue
+            
+            yield build_article(name, source, fields)
+            found += 1
+            print(f"   ✅ Added: {fields['title'][:60]}...")
         
-        print(f"   ✅ CNA: {len(articles)} relevant articles")
-        return articles
+        print(f"   ✅ {name}: {found} relevant articles")
         
+    except TimeoutError:
+        print(f"   ⏱️  {name}: out of time")
+        raise
     except Exception as e:
-        print(f"   ❌ Error scraping CNA: {e}")
-        return []
+        print(f"   ❌ Error scraping {name}: {e}")
+
+def scrape_business_times(pool, state=None, deadline=None):
+    """Scrape Business Times - HDB news"""
+    return scrape_source('Business Times', pool, state, deadline)
+
+def scrape_straits_times(pool, state=None, deadline=None):
+    """Scrape The Straits Times - HDB search"""
+    return scrape_source('The Straits Times', pool, state, deadline)
 
-def scrape_propertyguru(driver):
+def scrape_cna(pool, state=None, deadline=None):
+    """Scrape CNA - HDB topic"""
+    return scrape_source('CNA', pool, state, deadline)
+
+def scrape_propertyguru(pool, state=None, deadline=None):
     """Scrape PropertyGuru Singapore News"""
-    print("\n📰 Scraping PropertyGuru...")
-    url = "https://www.propertyguru.com.sg/property-management-news"
-    articles = []
+    return scrape_source('PropertyGuru', pool, state, deadline)
+
+# Crawl-state id -> site scraper
+SITE_SCRAPERS = {
+    'business_times': scrape_business_times,
+    'straits_times': scrape_straits_times,
+    'cna': scrape_cna,
+    'propertyguru': scrape_propertyguru
+}
+
+def scrape_all(pool, states=None):
+    """
+    Run every site scraper in parallel and stream their articles as they
+    arrive; browsers are checked out only when needed
+    """
+    states = states or {}
+    return parallel_stream([partial(scrape_fn, pool, states.get(key)) for key, scrape_fn in SITE_SCRAPERS.items()],
+                           max_workers=pool.max_browsers)
+
+def print_fetch_stats():
+    print(f"\n🚦 Fetch path hit rate (http / browser / none):")
+    for name, hits in path_hits.items():
+        runs = sum(hits.values())
+        http_rate = (hits['http'] / runs * 100) if runs else 0.0
+        print(f"   {name}: {hits['http']} / {hits['browser']} / {hits['none']} ({http_rate:.0f}% via HTTP)")
     
-    try:
-        driver.get(url)
-        time.sleep(3)
-        
-        # Find article elements
-        article_elements = driver.find_elements(By.CSS_SELECTOR, "article.news-card, div.article-item")
-        
-        print(f"   Found {len(article_elements)} potential articles")
-        
-        for elem in article_elements[:10]:
-            try:
-                title_elem = elem.find_element(By.CSS_SELECTOR, "h2, h3, a.title")
-                title = title_elem.text.strip()
-                
-                link_elem = elem.find_element(By.CSS_SELECTOR, "a")
-                link = link_elem.get_attribute('href')
-                
-                try:
-                    desc_elem = elem.find_element(By.CSS_SELECTOR, "p, div.description")
-                    description = desc_elem.text.strip()
-                except:
-                    description = title
-                
-                if not is_property_related(title, description):
-                    continue
-                
-                article = {
-                    'article_id': generate_article_id('PropertyGuru', link, datetime.now().isoformat()),
-                    'title': title,
-                    'description': description,
-                    'url': link,
-                    'source': {
-                        'name': 'PropertyGuru',
-                        'url': 'https://www.propertyguru.com.sg',
-                        'type': 'property_portal'
-                    },
-                    'published_at': datetime.now().isoformat(),
-                    'scraped_at': datetime.now().isoformat(),
-                    'locations': extract_locations(f"{title} {description}"),
-                    'categories': extract_categories(f"{title} {description}"),
-                    'sentiment': analyze_sentiment(f"{title} {description}"),
-                    'impact_assessment': {
-                        'predicted_impact': 'moderate_positive',
-                        'affected_areas': extract_locations(f"{title} {description}"),
-                        'timeframe': 'short_term'
-                    },
-                    'keywords': [w for w in REQUIRED_KEYWORDS if w in f"{title} {description}".lower()][:5],
-                    'relevance_score': 0.95,
-                    'view_count': 0,
-                    'is_active': True
-                }
-                
-                articles.append(article)
-                print(f"   ✅ Added: {title[:60]}...")
-                
-            except Exception as e:
-                continue
-        
-        print(f"   ✅ PropertyGuru: {len(articles)} relevant articles")
-        return articles
-        
-    except Exception as e:
-        print(f"   ❌ Error scraping PropertyGuru: {e}")
-        return []
+    print(f"\n⏱️  Page-ready latency:")
+    for site, latency in page_ready_latency.items():
+        print(f"   {site}: {'timed out' if latency is None else f'{latency:.1f}s'}")
 
-def save_to_mongodb(articles):
-    """Save articles to MongoDB"""
-    if not articles:
-        print("\n⚠️  No articles to save")
-        return
+def run_once(pool, enrich_pool=None):
+    # Insert or overwrite, saved incrementally as each site yields
+    states = {key: SourceState(key) for key in SITE_SCRAPERS}
+    saver = BulkSaver(news_collection(), key='article_id')
+    near_dups = shared_index('news')
+    stats = run_pipeline(scrape_all(pool, states), saver, key='article_id', enrich=enrich_article,
+                         pool=enrich_pool, near_dups=near_dups, sentiment_text=sentiment_text)
+    saver.close()
+    near_dups.evict()
     
-    try:
-        client = MongoClient(MONGODB_URI)
-        db = client[MONGODB_DB_NAME]
-        collection = db['newsarticles']
-        
-        # Insert or update
-        inserted = 0
-        updated = 0
-        
-        for article in articles:
-            result = collection.update_one(
-                {'article_id': article['article_id']},
-                {'$set': article},
-                upsert=True
-            )
-            
-            if result.upserted_id:
-                inserted += 1
-            else:
-                updated += 1
-        
-        print(f"\n✅ Saved to MongoDB:")
-        print(f"   📝 Inserted: {inserted}")
-        print(f"   🔄 Updated: {updated}")
-        print(f"   📊 Total: {len(articles)}")
-        
-        client.close()
-        
-    except Exception as e:
-        print(f"\n❌ Error saving to MongoDB: {e}")
+    if saver.counts['failed']:
+        print("\n⚠️  Some saves failed; crawl state not advanced")
+    else:
+        for state in states.values():
+            state.save()
+    
+    print("\n" + "=" * 70)
+    print("🎉 SCRAPING COMPLETE!")
+    print("=" * 70)
+    print(f"\n📊 Summary:")
+    print(f"   Total Articles: {stats.total}")
+    print(f"   All property-related: ✅")
+    print(f"   Filtered out irrelevant: ✅")
+    stats.print_summary()
+    saver.print_counts()
+    
+    print_fetch_stats()
+    shared_sentiment().print_stats()
+    near_dups.print_stats()
 
 def main():
     """Main scraper function"""
+    parser = argparse.ArgumentParser(description='High-quality property news scraper')
+    parser.add_argument('--max-browsers', type=int, default=MAX_BROWSERS,
+                        help='Maximum concurrent headless browsers')
+    parser.add_argument('--enrich-processes', type=int, default=ENRICH_PROCESSES,
+                        help='Worker processes for text analysis (0 = inline)')
+    parser.add_argument('--interval', type=int, default=0,
+                        help='Keep browsers alive and re-run every N seconds (0 = run once)')
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("🏠 HIGH-QUALITY PROPERTY NEWS SCRAPER")
     print("=" * 70)
@@ -531,43 +549,34 @@ def main():
     print("\n🎯 Filtering:")
     print("   ✅ ONLY property/housing-related content")
     print("   ❌ NO bus operations, awards, general transport")
+    print(f"\n⚡ Browsers: up to {args.max_browsers} in parallel")
     print("\n" + "=" * 70)
     
-    driver = None
-    all_articles = []
+    pool = DriverPool(setup_driver, max_browsers=args.max_browsers)
+    # Like the browsers, enrichment workers are kept alive between runs
+    enrich_pool = EnrichmentPool(args.enrich_processes) if args.enrich_processes else None
     
     try:
-        driver = setup_driver()
-        
-        # Scrape all sources
-        all_articles.extend(scrape_business_times(driver))
-        time.sleep(2)
-        
-        all_articles.extend(scrape_straits_times(driver))
-        time.sleep(2)
-        
-        all_articles.extend(scrape_cna(driver))
-        time.sleep(2)
-        
-        all_articles.extend(scrape_propertyguru(driver))
-        
-        # Save to MongoDB
-        save_to_mongodb(all_articles)
-        
-        print("\n" + "=" * 70)
-        print("🎉 SCRAPING COMPLETE!")
-        print("=" * 70)
-        print(f"\n📊 Summary:")
-        print(f"   Total Articles: {len(all_articles)}")
-        print(f"   All property-related: ✅")
-        print(f"   Filtered out irrelevant: ✅")
-        
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
+        while True:
+            try:
+                run_once(pool, enrich_pool)
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
+            
+            if args.interval <= 0:
+                break
+            
+            print(f"\n⏳ Next run in {args.interval}s (browsers kept alive)...")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped")
     
     finally:
-        if driver:
-            driver.quit()
+        pool.close()
+        if enrich_pool:
+            enrich_pool.close()
+        shared_index('news').close()
+        close_mongo()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Process-wide resources shared by every scraper
+- .env loaded once (database/scripts/.env, else the working directory)
+- One MongoClient connection pool, opened on first use instead of at import
+- CACHE_DIR for the on-disk caches (SCRAPER_CACHE_DIR, default ./.cache)
+The HTTP client is http_client.shared_client() and the sentiment scorer
+sentiment_service.shared_sentiment(); browser pools are created by whoever
+needs browsers (premium scraper, scraper_runner).
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+ENV_FILE = Path(__file__).parent.parent.parent / 'database' / 'scripts' / '.env'
+
+if ENV_FILE.exists():
+    load_dotenv(ENV_FILE)
+else:
+    load_dotenv()
+
+MONGODB_URI = os.getenv('MONGODB_URI')
+MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'INF2006-Database_Systems')
+CACHE_DIR = Path(os.getenv('SCRAPER_CACHE_DIR', Path(__file__).parent / '.cache'))
+
+_lock = threading.Lock()
+_client = None
+
+
+def mongo_client():
+    """The process-wide MongoClient, created on first use"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
+    return _client
+
+
+def get_db():
+    return mongo_client()[MONGODB_DB_NAME]
+
+
+def news_collection():
+    return get_db()['newsarticles']
+
+
+def check_connection():
+    """Fail fast with a clear message when MongoDB is unreachable"""
+    mongo_client().server_info()
+    print(f"✅ Connected to MongoDB: {MONGODB_DB_NAME}\n")
+
+
+def close_mongo():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
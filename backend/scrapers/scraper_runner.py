@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Unified scraper runner
+- One process for every news source: HDB, URA, LTA, Google News RSS,
+  Business Times, Straits Times, CNA, PropertyGuru
+- Sources come from SOURCE_REGISTRY and share one Mongo pool, HTTP client,
+  sentiment service, near-duplicate index and browser pool
+- Sources run concurrently, each with its own timeout (checked between
+  articles; browser checkout and page waits are cut short at the deadline,
+  single HTTP requests are bounded by their own timeouts)
+- --daemon keeps polling every source on its own adaptive interval, with at
+  most --max-workers sources running at any time
+
+Usage: python scraper_runner.py [--sources hdb,ura,...] [--max-workers N]
+                                [--max-browsers N] [--timeout SECONDS] [--refresh]
+                                [--enrich-processes N] [--daemon]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from datetime import datetime
+
+import google_news_scraper as google_news
+import official_sources_scraper as official
+import premium_news_scraper as premium
+from article_pipeline import BulkSaver, EnrichmentPool, StreamStats, run_pipeline, ENRICH_PROCESSES
+from driver_pool import DriverPool
+from http_client import shared_client
+from scraper_resources import news_collection, get_db, check_connection, close_mongo
+from scraper_state import SourceState
+from poll_schedule import PollSchedule
+from sentiment_service import shared_sentiment
+from near_duplicates import shared_index
+
+# Sources scraped at the same time (browser-backed ones also wait on the browser pool)
+RUNNER_MAX_WORKERS = int(os.getenv('RUNNER_MAX_WORKERS', '4'))
+
+# name -> how to scrape it and how its articles are stored.
+# scrape(ctx) returns an article generator; ctx has 'pool', 'refresh' and the
+# source's crawl 'state' (a SourceState stored under the registry name),
+# plus the process-wide 'enrich_pool' (None = enrich inline).
+# sentiment_text: the text enrich scores, pre-scored by the pipeline in batches.
+# poll: daemon-mode (initial, min, max) polling interval in seconds.
+SOURCE_REGISTRY = {
+    'hdb': {
+        'scrape': lambda ctx: official.scrape_hdb(ctx['state']),
+        'enrich': official.enrich_article,
+        'sentiment_text': official.sentiment_text,
+        'key': 'url',
+        'update_fields': ['last_updated'],
+        'timeout': 60,
+        'poll': (3600, 900, 21600)
+    },
+    'ura': {
+        'scrape': lambda ctx: official.scrape_ura(ctx['state']),
+        'enrich': official.enrich_article,
+        'sentiment_text': official.sentiment_text,
+        'key': 'url',
+        'update_fields': ['last_updated'],
+        'timeout': 60,
+        'poll': (3600, 900, 21600)
+    },
+    'lta': {
+        'scrape': lambda ctx: official.scrape_lta(ctx['state']),
+        'enrich': official.enrich_article,
+        'sentiment_text': official.sentiment_text,
+        'key': 'url',
+        'update_fields': ['last_updated'],
+        'timeout': 60,
+        'poll': (3600, 900, 21600)
+    },
+    'google_rss': {
+        'scrape': lambda ctx: google_news.scrape_google_news_rss(refresh=ctx['refresh'], state=ctx['state']),
+        'enrich': google_news.build_article,
+        'sentiment_text': google_news.sentiment_text,
+        'key': 'url',
+        'update_fields': ['last_updated', 'locations'],
+        'timeout': 180,
+        'poll': (600, 120, 3600)
+    },
+    'business_times': {
+        'scrape': lambda ctx: premium.scrape_business_times(ctx['pool'], ctx['state'], ctx['deadline']),
+        'enrich': premium.enrich_article,
+        'sentiment_text': premium.sentiment_text,
+        'key': 'article_id',
+        'update_fields': None,
+        'timeout': 120,
+        'poll': (900, 300, 7200)
+    },
+    'straits_times': {
+        'scrape': lambda ctx: premium.scrape_straits_times(ctx['pool'], ctx['state'], ctx['deadline']),
+        'enrich': premium.enrich_article,
+        'sentiment_text': premium.sentiment_text,
+        'key': 'article_id',
+        'update_fields': None,
+        'timeout': 120,
+        'poll': (900, 300, 7200)
+    },
+    'cna': {
+        'scrape': lambda ctx: premium.scrape_cna(ctx['pool'], ctx['state'], ctx['deadline']),
+        'enrich': premium.enrich_article,
+        'sentiment_text': premium.sentiment_text,
+        'key': 'article_id',
+        'update_fields': None,
+        'timeout': 120,
+        'poll': (900, 300, 7200)
+    },
+    'propertyguru': {
+        'scrape': lambda ctx: premium.scrape_propertyguru(ctx['pool'], ctx['state'], ctx['deadline']),
+        'enrich': premium.enrich_article,
+        'sentiment_text': premium.sentiment_text,
+        'key': 'article_id',
+        'update_fields': None,
+        'timeout': 120,
+        'poll': (1800, 600, 14400)
+    },
+}
+
+
+def until_deadline(articles, deadline, progress):
+    """Pass articles through until the deadline, then close the source generator"""
+    for article in articles:
+        yield article
+        if time.monotonic() > deadline:
+            progress['timed_out'] = True
+            articles.close()
+            return
+
+
+def run_source(name, ctx, timeout=None):
+    """Scrape one registered source through its own pipeline; returns a result dict"""
+    spec = SOURCE_REGISTRY[name]
+    timeout = timeout or spec['timeout']
+    started = time.monotonic()
+    deadline = started + timeout
+    progress = {'timed_out': False}
+
+    saver = BulkSaver(news_collection(), key=spec['key'], update_fields=spec['update_fields'])
+    stats = StreamStats()
+    error = None
+
+    try:
+        crawl_state = SourceState(name, fresh=ctx['refresh'])
+        articles = until_deadline(spec['scrape'](dict(ctx, state=crawl_state, deadline=deadline)),
+                                  deadline, progress)
+        run_pipeline(articles, saver, key=spec['key'], enrich=spec['enrich'], stats=stats,
+                     pool=ctx['enrich_pool'], near_dups=shared_index('news'),
+                     sentiment_text=spec['sentiment_text'])
+    except TimeoutError:
+        # A browser checkout or page wait ran into the deadline
+        progress['timed_out'] = True
+    except Exception as e:
+        error = str(e)
+    finally:
+        saver.close()
+
+    if error:
+        status = f'error: {error}'
+    elif progress['timed_out']:
+        status = f'timed out after {timeout}s'
+    else:
+        status = 'ok'
+
+    # Only a complete, fully saved scan may move the high-water mark or let
+    # later runs skip the pages it fetched
+    http = shared_client()
+    if status == 'ok' and not saver.counts['failed']:
+        crawl_state.save()
+        http.commit_validators(name)
+    else:
+        http.discard_validators(name)
+
+    return {
+        'status': status,
+        'stats': stats,
+        'counts': saver.counts,
+        'seconds': time.monotonic() - started
+    }
+
+
+def run_sources(names, ctx, max_workers=RUNNER_MAX_WORKERS, timeout=None):
+    """Run the given sources concurrently; returns {name: result}"""
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_source, name, ctx, timeout): name for name in names}
+
+        for future in as_completed(futures):
+            name = futures[future]
+            results[name] = future.result()
+            print(f"\n🏁 {name}: {results[name]['status']} "
+                  f"({results[name]['stats'].total} articles, {results[name]['seconds']:.1f}s)")
+
+    return results
+
+
+def run_daemon(names, ctx, max_workers=RUNNER_MAX_WORKERS, timeout=None):
+    """
+    Poll each source on its own adaptive schedule until interrupted.
+    max_workers is the global concurrency budget: a due source waits while
+    that many are already running. --refresh only applies to each source's
+    first run.
+    """
+    schedule = PollSchedule({name: SOURCE_REGISTRY[name]['poll'] for name in names},
+                            state_collection=get_db()['scraper_state'])
+    polled = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while True:
+                now = time.monotonic()
+                for name in schedule.due(now, running=running.values()):
+                    if len(running) >= max_workers:
+                        break
+                    run_ctx = dict(ctx, refresh=ctx['refresh'] and name not in polled)
+                    running[executor.submit(run_source, name, run_ctx, timeout)] = name
+                    polled.add(name)
+
+                # With the budget full, a due source cannot start before one finishes
+                if len(running) >= max_workers:
+                    pause = None
+                else:
+                    pause = schedule.seconds_until_next(time.monotonic(), running=running.values())
+                if not running:
+                    time.sleep(pause or 1)
+                    continue
+
+                done, _ = wait(running, timeout=pause, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    interval = schedule.record(name, result['counts']['inserted'], ok=result['status'] == 'ok')
+                    print(f"\n🏁 {name}: {result['status']} | ✅ {result['counts']['inserted']} new | "
+                          f"next poll in {interval / 60:.1f} min")
+
+                # Housekeeping while nothing is in flight
+                if not running:
+                    google_news.article_cache.evict()
+                    shared_index('news').evict()
+        except KeyboardInterrupt:
+            print(f"\n⏹️  Stopping; waiting for {len(running)} running sources...")
+
+
+def print_summary(results):
+    print("\n" + "=" * 70)
+    print("📊 RUN SUMMARY")
+    print("=" * 70)
+
+    totals = {'found': 0, 'inserted': 0, 'updated': 0, 'failed': 0}
+    for name, result in results.items():
+        counts = result['counts']
+        print(f"   {name:<15} {result['stats'].total:4d} found | ✅ {counts['inserted']:3d} new | "
+              f"🔄 {counts['updated']:3d} updated | ⚠️  {counts['failed']:2d} failed | "
+              f"{result['seconds']:6.1f}s | {result['status']}")
+        totals['found'] += result['stats'].total
+        for field in ('inserted', 'updated', 'failed'):
+            totals[field] += counts[field]
+
+    print(f"\n   TOTAL: {totals['found']} found | ✅ {totals['inserted']} new | "
+          f"🔄 {totals['updated']} updated | ⚠️  {totals['failed']} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run every news scraper in one process')
+    parser.add_argument('--sources', default=','.join(SOURCE_REGISTRY),
+                        help=f"Comma-separated subset of: {', '.join(SOURCE_REGISTRY)}")
+    parser.add_argument('--max-workers', type=int, default=RUNNER_MAX_WORKERS,
+                        help='Sources scraped concurrently')
+    parser.add_argument('--max-browsers', type=int, default=premium.MAX_BROWSERS,
+                        help='Maximum concurrent headless browsers')
+    parser.add_argument('--timeout', type=int, default=None,
+                        help='Per-source timeout in seconds (overrides the registry)')
+    parser.add_argument('--enrich-processes', type=int, default=ENRICH_PROCESSES,
+                        help='Worker processes for text analysis, shared by all sources (0 = inline)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore crawl state and refetch article bodies even if stored or cached')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Keep polling each source on its own adaptive interval')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.sources.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SOURCE_REGISTRY]
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(unknown)}")
+
+    try:
+        check_connection()
+    except Exception as e:
+        print(f"❌ Connection failed: {e}")
+        exit(1)
+
+    print("\n" + "=" * 70)
+    print("🗞️  UNIFIED NEWS SCRAPER RUNNER")
+    print("=" * 70)
+    print(f"Sources: {', '.join(names)}")
+    print(f"⚡ {args.max_workers} sources at once | up to {args.max_browsers} browsers")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    http = shared_client()
+    pool = DriverPool(premium.setup_driver, max_browsers=args.max_browsers)
+    # One set of enrichment workers shared by every source and every daemon poll
+    enrich_pool = EnrichmentPool(args.enrich_processes) if args.enrich_processes else None
+    ctx = {'pool': pool, 'refresh': args.refresh, 'enrich_pool': enrich_pool}
+
+    try:
+        if args.daemon:
+            run_daemon(names, ctx, max_workers=args.max_workers, timeout=args.timeout)
+            http.print_stats()
+            premium.print_fetch_stats()
+            shared_sentiment().print_stats()
+            shared_index('news').print_stats()
+            return
+
+        results = run_sources(names, ctx, max_workers=args.max_workers, timeout=args.timeout)
+        print_summary(results)
+
+        print(f"\n📦 Total in database: {news_collection().count_documents({})}")
+
+        http.print_stats()
+        premium.print_fetch_stats()
+        shared_sentiment().print_stats()
+        shared_index('news').print_stats()
+    finally:
+        pool.close()
+        if enrich_pool:
+            enrich_pool.close()
+        google_news.article_cache.close()
+        shared_index('news').close()
+        close_mongo()
+
+    print(f"\n✅ Done! {datetime.now().strftime('%H:%M:%S')}")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
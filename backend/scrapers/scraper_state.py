@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Per-source crawl state for incremental scraping (scraper_state collection)
+- One document per source: latest published_at seen (high-water mark) and
+  the most recently seen URLs
+- Listings and feeds are mostly newest-first, so a scan stops once it meets
+  a run of already-seen items instead of re-walking the whole page
+- Whether an item is known is decided by its URL alone; the high-water mark
+  only keeps a run going, since feeds such as Google News are ordered by
+  relevance and an older item can still be new to us
+- State is saved only after the run's articles are saved, so a crashed run
+  rescans the same items next time
+"""
+
+import os
+import threading
+from datetime import datetime
+
+from scraper_resources import get_db
+
+# Consecutive already-seen items that end a scan (feeds are only roughly ordered)
+STOP_AFTER_SEEN = int(os.getenv('SCRAPER_STOP_AFTER_SEEN', '3'))
+MAX_SEEN_URLS = int(os.getenv('SCRAPER_STATE_MAX_SEEN', '1000'))
+
+
+class SourceState:
+    def __init__(self, source, collection=None, fresh=False, max_seen=MAX_SEEN_URLS,
+                 stop_after=STOP_AFTER_SEEN):
+        """
+        fresh: ignore the stored state for this run (it is still saved afterwards)
+        """
+        self.source = source
+        self.collection = collection if collection is not None else get_db()['scraper_state']
+        self.max_seen = max_seen
+        self.stop_after = stop_after
+        self.lock = threading.Lock()
+        self.new_items = 0
+
+        doc = None if fresh else self.collection.find_one({'_id': source})
+        self.latest_published_at = doc.get('latest_published_at') if doc else None
+        self.seen_urls = list(doc.get('seen_urls', [])) if doc else []
+        # Both fixed for the run, so items marked now don't end scans of other feeds
+        self.watermark = self.latest_published_at
+        self._seen = set(self.seen_urls)
+        self._marked = []
+        self._marked_set = set()
+
+    def is_known(self, url):
+        """Seen in a recent run"""
+        return url in self._seen
+
+    def is_old(self, published_at):
+        """Published before the high-water mark"""
+        return bool(published_at and self.watermark and published_at < self.watermark)
+
+    def mark(self, url, published_at=None):
+        with self.lock:
+            if url not in self._seen and url not in self._marked_set:
+                self._marked_set.add(url)
+                self._marked.append(url)
+                self.new_items += 1
+            if published_at and (self.latest_published_at is None or published_at > self.latest_published_at):
+                self.latest_published_at = published_at
+
+    def scan(self):
+        return ListingScan(self)
+
+    def save(self):
+        """Persist the high-water mark and recent URLs; call once results are saved"""
+        with self.lock:
+            self.seen_urls = (self._marked + self.seen_urls)[:self.max_seen]
+            self._seen = set(self.seen_urls)
+            self._marked = []
+            self._marked_set = set()
+            self.watermark = self.latest_published_at
+
+            self.collection.update_one(
+                {'_id': self.source},
+                {'$set': {
+                    'latest_published_at': self.latest_published_at,
+                    'seen_urls': self.seen_urls,
+                    'last_new_items': self.new_items,
+                    'updated_at': datetime.now()
+                }},
+                upsert=True
+            )
+            self.new_items = 0
+
+
+class ListingScan:
+    """One pass over a newest-first listing or feed"""
+
+    def __init__(self, state):
+        self.state = state
+        self.run = 0
+        self.skipped = 0
+        self.stopped = False
+        self.urls = set()
+
+    def is_new(self, url, published_at=None):
+        """
+        True if the item should be processed (it is marked seen). Known items
+        return False; after stop_after of them in a row, stopped is set.
+        An unseen item older than the high-water mark is processed but does
+        not break the run. Repeats of a URL within this scan are ignored.
+        """
+        if url in self.urls:
+            return False
+        self.urls.add(url)
+
+        if self.state.is_known(url):
+            self.run += 1
+            self.skipped += 1
+            self.stopped = self.run >= self.state.stop_after
+            return False
+
+        if not self.state.is_old(published_at):
+            self.run = 0
+        self.state.mark(url, published_at)
+        return True
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Shared sentiment scoring service used by every scraper
+- Requests from all threads are gathered into micro-batches (up to
+  SENTIMENT_BATCH_SIZE texts or SENTIMENT_MAX_WAIT_MS) and scored on a small
+  worker pool, off the scrapers' I/O threads
+- LRU cache keyed on the text's sha1
+- Pluggable backend: VADER by default, or a local ONNX transformer on CPU
+  (SENTIMENT_BACKEND=onnx, needs onnxruntime + tokenizers and a model dir
+  with model.onnx and tokenizer.json); falls back to VADER if unavailable
+- Same output everywhere: {'score': compound in [-1, 1], 'label': ...}
+"""
+
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+try:
+    import numpy
+    import onnxruntime
+    from tokenizers import Tokenizer
+except ImportError:
+    onnxruntime = None
+
+BACKEND = os.getenv('SENTIMENT_BACKEND', 'vader')
+ONNX_MODEL_DIR = Path(os.getenv('SENTIMENT_ONNX_MODEL', Path(__file__).parent / 'models' / 'sentiment'))
+WORKERS = int(os.getenv('SENTIMENT_WORKERS', '2'))
+BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', '32'))
+MAX_WAIT = int(os.getenv('SENTIMENT_MAX_WAIT_MS', '5')) / 1000
+CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', '4096'))
+
+
+class VaderBackend:
+    name = 'vader'
+
+    def __init__(self):
+        self.analyzer = SentimentIntensityAnalyzer()
+
+    def score_batch(self, texts):
+        return [self.analyzer.polarity_scores(text)['compound'] for text in texts]
+
+
+class OnnxBackend:
+    """
+    Sequence-classification model exported to ONNX. Output columns are read
+    as (negative, [neutral,] positive); the score is P(positive) - P(negative).
+    """
+    name = 'onnx'
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, max_length=128):
+        model_dir = Path(model_dir)
+        self.session = onnxruntime.InferenceSession(str(model_dir / 'model.onnx'),
+                                                    providers=['CPUExecutionProvider'])
+        self.tokenizer = Tokenizer.from_file(str(model_dir / 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def score_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        feeds = {
+            'input_ids': numpy.array([e.ids for e in encodings], dtype=numpy.int64),
+            'attention_mask': numpy.array([e.attention_mask for e in encodings], dtype=numpy.int64),
+            'token_type_ids': numpy.array([e.type_ids for e in encodings], dtype=numpy.int64)
+        }
+        logits = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        exp = numpy.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = exp / exp.sum(axis=1, keepdims=True)
+        return [float(p) for p in probs[:, -1] - probs[:, 0]]
+
+
+def load_backend(name=BACKEND):
+    if name == 'onnx':
+        if onnxruntime is None:
+            print("⚠️  SENTIMENT_BACKEND=onnx but onnxruntime/tokenizers not installed; using VADER")
+        elif not (ONNX_MODEL_DIR / 'model.onnx').exists():
+            print(f"⚠️  No ONNX model in {ONNX_MODEL_DIR}; using VADER")
+        else:
+            return OnnxBackend()
+    return VaderBackend()
+
+
+def to_result(compound):
+    label = 'positive' if compound >= 0.1 else ('negative' if compound <= -0.1 else 'neutral')
+    return {'score': round(compound, 2), 'label': label}
+
+
+class SentimentService:
+    def __init__(self, backend=None, workers=WORKERS, batch_size=BATCH_SIZE, max_wait=MAX_WAIT,
+                 cache_size=CACHE_SIZE):
+        self.backend = backend or load_backend()
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'texts': 0, 'cache_hits': 0, 'batches': 0, 'scored': 0}
+
+        # Threads start on first use, so importing a scraper in a worker
+        # process (which then calls make_inline) never spawns them
+        self.inline = False
+        self.worker_count = workers
+        self.pending = queue.Queue()
+        self.workers = None
+
+    def make_inline(self):
+        """Score on the calling thread; for process-pool workers that already run off the I/O path"""
+        self.inline = True
+
+    def _start(self):
+        with self.lock:
+            if self.workers is None:
+                self.workers = ThreadPoolExecutor(max_workers=self.worker_count, thread_name_prefix='sentiment')
+                threading.Thread(target=self._dispatch, daemon=True).start()
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _cached(self, key):
+        with self.lock:
+            compound = self.cache.get(key)
+            if compound is not None:
+                self.cache.move_to_end(key)
+            return compound
+
+    def _remember(self, key, compound):
+        with self.lock:
+            self.cache[key] = compound
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def submit(self, text):
+        """Queue one text; returns a Future of {'score', 'label'}"""
+        text = text or ''
+        key = self.key(text)
+        future = Future()
+
+        with self.lock:
+            self.stats['texts'] += 1
+        compound = self._cached(key)
+        if compound is not None:
+            with self.lock:
+                self.stats['cache_hits'] += 1
+            future.set_result(to_result(compound))
+            return future
+
+        if self.inline:
+            self._score([(text, key, future)])
+        else:
+            self._start()
+            self.pending.put((text, key, future))
+        return future
+
+    def score(self, text):
+        return self.submit(text).result()
+
+    def score_batch(self, texts):
+        if self.inline:
+            return self._score_inline(texts)
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def _score_inline(self, texts):
+        """One backend call for every uncached text"""
+        texts = [text or '' for text in texts]
+        keys = [self.key(text) for text in texts]
+        compounds = [self._cached(key) for key in keys]
+        missing = [i for i, compound in enumerate(compounds) if compound is None]
+
+        if missing:
+            scored = self.backend.score_batch([texts[i] for i in missing])
+            for i, compound in zip(missing, scored):
+                compounds[i] = compound
+                self._remember(keys[i], compound)
+
+        with self.lock:
+            self.stats['texts'] += len(texts)
+            self.stats['cache_hits'] += len(texts) - len(missing)
+            if missing:
+                self.stats['batches'] += 1
+                self.stats['scored'] += len(missing)
+        return [to_result(compound) for compound in compounds]
+
+    def _dispatch(self):
+        """Collect queued texts into micro-batches and hand them to the workers"""
+        while True:
+            batch = [self.pending.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.pending.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+            self.workers.submit(self._score, batch)
+
+    def _score(self, batch):
+        try:
+            compounds = self.backend.score_batch([text for text, _, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self.lock:
+            self.stats['batches'] += 1
+            self.stats['scored'] += len(batch)
+        for (_, key, future), compound in zip(batch, compounds):
+            self._remember(key, compound)
+            future.set_result(to_result(compound))
+
+    def print_stats(self):
+        batches = self.stats['batches']
+        avg = self.stats['scored'] / batches if batches else 0.0
+        print(f"\n🧠 Sentiment ({self.backend.name}): {self.stats['texts']} texts | "
+              f"cache hits: {self.stats['cache_hits']} | {batches} batches (avg {avg:.1f})")
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def shared_sentiment():
+    """The process-wide SentimentService, created on first use"""
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = SentimentService()
+    return _shared_service
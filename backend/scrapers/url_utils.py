@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+URL canonicalization for deduplicating scraped links
+- Resolves Google News RSS article links to the publisher URL when the
+  target is embedded in the article id (no network request)
+- Strips tracking parameters, fragments and trailing slashes
+"""
+
+import base64
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+TRACKING_PARAMS = {
+    'oc', 'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'cmpid', 'cid', 'ito', 'guccounter', 'guce_referrer', 'guce_referrer_sig'
+}
+
+_EMBEDDED_URL = re.compile(rb'https?://[\x21-\x7e]+')
+
+
+def decode_google_news_url(url):
+    """
+    Google News RSS links look like news.google.com/rss/articles/<id>.
+    Older ids are base64url-encoded protobufs that contain the publisher URL;
+    return it if present, else None (newer ids need a JS redirect to resolve).
+    """
+    parts = urlsplit(url)
+    if parts.netloc != 'news.google.com' or '/articles/' not in parts.path:
+        return None
+
+    article_id = parts.path.rsplit('/', 1)[-1]
+    try:
+        raw = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+    except Exception:
+        return None
+
+    match = _EMBEDDED_URL.search(raw)
+    return match.group(0).decode('ascii') if match else None
+
+
+def canonicalize_url(url):
+    """Canonical form used for dedup and storage"""
+    if not url:
+        return url
+
+    url = decode_google_news_url(url.strip()) or url.strip()
+    parts = urlsplit(url)
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ]
+    path = parts.path.rstrip('/') or '/'
+
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
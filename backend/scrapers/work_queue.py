@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lease-based work queue over a MongoDB collection
+- Workers claim pending documents with a conditional update that stamps
+  lease_owner and lease_until, so two workers never get the same one; a batch
+  is claimed in three round trips (candidates, update_many, read back)
+- The consumer acknowledges a document by clearing the lease fields while it
+  marks it done (LEASE_UNSET); an unacknowledged lease simply expires and the
+  document is claimed again, so a crashed worker loses nothing
+- While a document is held, the worker renews its lease on a heartbeat, so a
+  slow batch is not claimed a second time; lease times come from the server
+  clock ($$NOW), so workers on other hosts or time zones agree on expiry
+- A worker that stops cleanly releases its leases right away
+"""
+
+import os
+import socket
+
+from pymongo import ASCENDING
+
+LEASE_SECONDS = int(os.getenv('WORK_QUEUE_LEASE_SECONDS', '900'))
+CLAIM_BATCH = int(os.getenv('WORK_QUEUE_CLAIM_BATCH', '20'))
+
+# Part of the acknowledging update: {'$unset': LEASE_UNSET}
+LEASE_UNSET = {'lease_owner': '', 'lease_until': ''}
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseQueue:
+    def __init__(self, collection, pending_filter, worker_id=None, lease_seconds=LEASE_SECONDS,
+                 claim_batch=CLAIM_BATCH):
+        """
+        pending_filter: documents still to be processed, e.g. {'processed': False}
+        """
+        self.collection = collection
+        self.pending_filter = pending_filter
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.claim_batch = claim_batch
+        self.claimed = 0
+        self.held = set()
+
+    def _claimable(self):
+        return {**self.pending_filter,
+                '$or': [{'lease_until': None}, {'$expr': {'$lt': ['$lease_until', '$$NOW']}}]}
+
+    def _lease_until(self):
+        # Aggregation expression evaluated on the server
+        return {'$add': ['$$NOW', self.lease_seconds * 1000]}
+
+    def ensure_indexes(self):
+        self.collection.create_index([(field, ASCENDING) for field in self.pending_filter] +
+                                     [('lease_until', ASCENDING)])
+
+    def claim(self):
+        """
+        Lease up to claim_batch documents; an empty list means the queue is drained.
+        Candidates another worker leases first are filtered out by the update,
+        so the batch may come back short while documents remain.
+        """
+        while True:
+            candidates = [doc['_id'] for doc in self.collection.find(
+                self._claimable(), {'_id': 1}, sort=[('_id', ASCENDING)], limit=self.claim_batch
+            )]
+            if not candidates:
+                return []
+
+            self.collection.update_many(
+                {**self._claimable(), '_id': {'$in': candidates}},
+                [{'$set': {'lease_owner': self.worker_id, 'lease_until': self._lease_until()}}]
+            )
+            docs = list(self.collection.find(
+                {'_id': {'$in': candidates}, 'lease_owner': self.worker_id, **self.pending_filter},
+                sort=[('_id', ASCENDING)]
+            ))
+            if docs:
+                self.claimed += len(docs)
+                self.held.update(doc['_id'] for doc in docs)
+                return docs
+            # Every candidate went to another worker; try the next ones
+
+    def renew(self):
+        """Heartbeat: push back the expiry of every lease this worker still holds"""
+        if not self.held:
+            return 0
+        result = self.collection.update_many(
+            {'_id': {'$in': list(self.held)}, 'lease_owner': self.worker_id},
+            [{'$set': {'lease_until': self._lease_until()}}]
+        )
+        return result.modified_count
+
+    def settle(self, ids):
+        """Stop renewing these leases: acknowledged, or left to expire and be retried"""
+        self.held.difference_update(ids)
+
+    def release(self, ids=None):
+        """Give up leases (all of this worker's by default) so others can claim them now"""
+        query = {**self.pending_filter, 'lease_owner': self.worker_id}
+        if ids is not None:
+            if not ids:
+                return
+            query['_id'] = {'$in': list(ids)}
+        self.collection.update_many(query, {'$unset': LEASE_UNSET})
+        if ids is None:
+            self.held.clear()
+        else:
+            self.settle(ids)